@@ -6,6 +6,10 @@ CONTROLLER_MANAGER = None
 
 STYLER = None
 
+EVENT_JOURNAL = None
+
+CONTROLLER_SNAPSHOT = None
+
 
 def load(settings):
 
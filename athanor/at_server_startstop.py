@@ -34,6 +34,20 @@ def at_server_start():
     manager_class = class_from_module(settings.CONTROLLER_MANAGER_CLASS)
     athanor.CONTROLLER_MANAGER = manager_class()
     athanor.CONTROLLER_MANAGER.load()
+    athanor.CONTROLLER_MANAGER.warm_up(snapshot=athanor.CONTROLLER_SNAPSHOT)
+    athanor.CONTROLLER_SNAPSHOT = None
+
+    if settings.GAMEDATA_WATCH_INTERVAL:
+        athanor.CONTROLLER_MANAGER.get('gamedata').watch(settings.GAMEDATA_WATCH_INTERVAL)
+
+    if settings.EVENT_JOURNAL_EVENTS:
+        from athanor.utils.events import EVENT_MANAGER
+        from athanor.utils.journal import EventJournal
+        athanor.EVENT_JOURNAL = EventJournal(settings.EVENT_JOURNAL_PATH, settings.EVENT_JOURNAL_EVENTS,
+                                             flush_interval=settings.EVENT_JOURNAL_FLUSH_INTERVAL,
+                                             max_buffer=settings.EVENT_JOURNAL_BUFFER)
+        EVENT_MANAGER.add_sink(athanor.EVENT_JOURNAL)
+        athanor.EVENT_JOURNAL.start()
 
 
 def at_server_stop():
@@ -41,21 +55,38 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    # Deliver any deferred events that are still waiting in the queue.
+    from athanor.utils.events import EVENT_MANAGER
+    EVENT_MANAGER.flush()
+
+    if athanor.CONTROLLER_MANAGER and (gamedata := athanor.CONTROLLER_MANAGER.controllers.get('gamedata', None)):
+        gamedata.unwatch()
+        gamedata.close_store()
+
+    # Write out anything the Event Journal is still holding.
+    if athanor.EVENT_JOURNAL:
+        EVENT_MANAGER.remove_sink(athanor.EVENT_JOURNAL)
+        athanor.EVENT_JOURNAL.stop()
+        athanor.EVENT_JOURNAL = None
 
 
 def at_server_reload_start():
     """
     This is called only when server starts back up after a reload.
     """
-    pass
+    # Pick up the Controller snapshot left by at_server_reload_stop, for at_server_start to use.
+    if settings.CONTROLLER_SNAPSHOT_PATH:
+        from athanor.controllers.base import ControllerManager
+        athanor.CONTROLLER_SNAPSHOT = ControllerManager.read_snapshot(settings.CONTROLLER_SNAPSHOT_PATH,
+                                                                      settings.CONTROLLER_SNAPSHOT_MAX_AGE)
 
 
 def at_server_reload_stop():
     """
     This is called only time the server stops before a reload.
     """
-    pass
+    if settings.CONTROLLER_SNAPSHOT_PATH and athanor.CONTROLLER_MANAGER:
+        athanor.CONTROLLER_MANAGER.save_snapshot(settings.CONTROLLER_SNAPSHOT_PATH)
 
 
 def at_server_cold_start():
@@ -17,7 +17,7 @@ information.
 # Use the defaults from Evennia unless explicitly overridden
 from evennia.settings_default import *
 from collections import defaultdict
-import athanor, sys
+import athanor, sys, os
 
 ######################################################################
 # Evennia base server config
@@ -89,6 +89,81 @@ BASE_CONTROLLER_CLASS = "athanor.controlers.base.AthanorController"
 
 CONTROLLERS = dict()
 
+# At startup every Controller is loaded before the server accepts connections.
+# Controllers whose load_dependencies are satisfied and whose gather() is safe to
+# run off the main thread (threaded_gather) gather their data at the same time,
+# using up to this many threads. 1 loads serially. Of Athanor's own Controllers,
+# only GameData qualifies, since it only reads files. The Account and Character
+# Controllers build typeclassed objects, so they gather on the main thread, one
+# after another.
+CONTROLLER_WARMUP_THREADS = 4
+
+# On reload, Controllers save their indexes here and the restarted server
+# restores them instead of rebuilding them, after checking that the database
+# hasn't changed. Snapshots older than CONTROLLER_SNAPSHOT_MAX_AGE seconds are
+# ignored. Set the path to None to always rebuild.
+CONTROLLER_SNAPSHOT_PATH = os.path.join(SERVER_DIR, 'controllers.snapshot')
+CONTROLLER_SNAPSHOT_MAX_AGE = 300
+
+# Listings like @account/list are queried and sent in pages of this many rows,
+# so that huge tables don't block the server or flood the client.
+LIST_PAGE_SIZE = 50
+
+
+######################################################################
+# Events
+######################################################################
+# Global Events (emit_global) can be delivered 'sync' (every listener runs
+# inside the call that emitted the event) or 'deferred' (the event is queued
+# and delivered in batches on a later reactor tick). Deferring busy events
+# like account_online, character_online, or object_puppet keeps login and
+# puppet latency from growing with the number of listeners.
+# Example: EVENT_DISPATCH['object_puppet'] = 'deferred'
+EVENT_DISPATCH = dict()
+
+# The dispatch mode used for events not listed in EVENT_DISPATCH.
+EVENT_DISPATCH_DEFAULT = 'sync'
+
+# The maximum number of deferred events delivered per reactor tick.
+EVENT_DISPATCH_BATCH_SIZE = 100
+
+# Instrumentation counts how often each global event fires and how long each
+# listener takes. It can also be toggled at runtime with @events/enable.
+EVENT_INSTRUMENTATION = False
+
+# Listeners slower than this many seconds are logged. 0 disables the log.
+EVENT_SLOW_HANDLER_THRESHOLD = 0.05
+
+# How many recent latency samples are kept per listener for percentiles.
+EVENT_INSTRUMENTATION_SAMPLES = 500
+
+# Opposite transitions listed here can be coalesced. If a sender emits one
+# and then its opposite within EVENT_COALESCE_WINDOW seconds, neither is
+# delivered. This smooths over portal reconnect storms, at the cost of
+# delaying these events by the window.
+EVENT_COALESCE = [
+    ('account_online', 'account_offline'),
+    ('object_online', 'object_offline'),
+    ('character_online', 'character_offline'),
+]
+
+# Seconds to hold coalesced events. 0 disables coalescing.
+EVENT_COALESCE_WINDOW = 0
+
+# Global Events listed here are recorded to a compact, append-only binary
+# journal for later analysis with athanor.utils.journal.JournalReader.
+# Example: EVENT_JOURNAL_EVENTS = ['account_online', 'account_offline']
+EVENT_JOURNAL_EVENTS = []
+
+# The directory journal files are written to. One file is kept per day.
+EVENT_JOURNAL_PATH = os.path.join(LOG_DIR, 'events')
+
+# Seconds between journal writes.
+EVENT_JOURNAL_FLUSH_INTERVAL = 2.0
+
+# If this many events are waiting to be written, they're written right away.
+EVENT_JOURNAL_BUFFER = 1000
+
 
 ######################################################################
 # Game Data System
@@ -117,10 +192,12 @@ EXAMINE_HOOKS['session'] = []
 
 
 # KINDS CLASSES
+# The classes that gamedata entities are created as, unless their data names
+# one. They're only imported when an entity is created.
 DEFAULT_ENTITY_CLASSES = {
     'areas': "athanor.entities.areas.AthanorArea",
     'exits': "athanor.entities.exits.AthanorExit",
-    "gateway": "athanor.entities.gateways.AthanorGateway",
+    "gateways": "athanor.entities.gateways.AthanorGateway",
     "rooms": "athanor.entities.rooms.AthanorRoom",
     "mobiles": "athanor.entities.mobiles.AthanorMobile",
     "items": "athanor.entities.items.AthanorItem",
@@ -156,6 +233,10 @@ RESTRICTED_ACCOUNT_RENAME = False
 RESTRICTED_ACCOUNT_EMAIL = False
 RESTRICTED_ACCOUNT_PASSWORD = False
 
+# The Account Controller's permission index is built at startup unless there are
+# more accounts than this, in which case it's built the first time it's needed.
+ACCOUNT_PERMISSION_INDEX_LAZY = 20000
+
 EXAMINE_HOOKS['account'] = ['account', 'access',  'commands', 'tags', 'attributes', 'puppets']
 
 ######################################################################
@@ -199,6 +280,50 @@ BASE_OBJECT_TYPECLASS = "athanor.gamedb.objects.AthanorObject"
 ######################################################################
 GAMEDATA_MODULE_CLASS = "athanor.datamodule.AthanorDataModule"
 
+# Plugin data files are parsed in this many worker processes, but only if a
+# plugin has at least GAMEDATA_PARSE_THRESHOLD files; starting the workers
+# costs more than parsing a handful of files. 1 always parses in-process.
+GAMEDATA_PARSE_PROCESSES = 4
+GAMEDATA_PARSE_THRESHOLD = 32
+
+# Parsed data files, resolved templates, and prepared maps are saved here after
+# loading, so the next load only redoes what changed. None disables the cache.
+GAMEDATA_CACHE_PATH = os.path.join(SERVER_DIR, 'gamedata.cache')
+
+# YAML map files at least this many bytes are read one entry at a time while
+# their map is prepared, instead of being parsed whole first. 0 disables it.
+# This only avoids holding the parsed file. Without GAMEDATA_STORE_PATH, the
+# prepared map is still kept in memory whole, so peak memory is only bounded
+# when both are set.
+GAMEDATA_STREAM_THRESHOLD = 16 * 1024 * 1024
+
+# If set, resolved templates and prepared maps are kept in this SQLite file
+# rather than in memory, and read back on demand. Saves memory for games with
+# large amounts of gamedata. None keeps everything in memory.
+# Example: GAMEDATA_STORE_PATH = os.path.join(SERVER_DIR, 'gamedata.sqlite3')
+GAMEDATA_STORE_PATH = None
+
+# How many templates, and how many map entries, read from the store are kept
+# in memory.
+GAMEDATA_STORE_CACHE_SIZE = 1024
+
+# How many prepared map records are held before being written to the store.
+GAMEDATA_STORE_BATCH_SIZE = 500
+
+# Seconds between checks of plugin data directories for changed files, which
+# are then reloaded without a restart. Meant for building. 0 disables it.
+GAMEDATA_WATCH_INTERVAL = 0
+
+# Whether Regions in the database are created and updated from plugin data at
+# startup. Needs a Region typeclass providing create_region and update_data, set
+# as DEFAULT_ENTITY_CLASSES['regions'].
+GAMEDATA_SYNC_REGIONS = False
+
+# Whether Regions in the database that no longer appear in any plugin's data are
+# deleted at startup. Off by default, so that disabling a plugin doesn't destroy
+# its Regions.
+GAMEDATA_DELETE_REGIONS = False
+
 ATHANOR_PLUGINS = []
 
 # This file needs to be created if it doesn't exist. ATHANOR_PLUGINS should be imported from it, containing a list of
@@ -291,3 +416,4 @@ LOCK_FUNC_MODULES = tuple(LOCK_FUNC_MODULES)
 
 del athanor
 del sys
+del os
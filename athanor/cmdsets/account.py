@@ -3,6 +3,7 @@ from evennia.utils.utils import class_from_module
 from evennia import default_cmds
 from evennia.commands.default import account, admin, building, general
 from athanor.commands import accounts as ath_account
+from athanor.commands import events as ath_events
 
 
 CMDSETS = [class_from_module(cmdset) for cmdset in settings.CMDSETS["ACCOUNT"]]
@@ -55,6 +56,8 @@ class AthanorAccountCmdSet(default_cmds.AccountCmdSet):
         self.add(ath_account.CmdCharPuppet)
         self.add(ath_account.CmdCharUnpuppet)
 
+        self.add(ath_events.CmdEvents)
+
         for cmdset in CMDSETS:
             if hasattr(cmdset, "setup"):
                 cmdset.setup(self)
@@ -18,19 +18,21 @@ class CmdAccount(AdministrationCommand):
             Display a breakdown of information all about an Account.
             Your own, if not targeted.
 
-        @account/list
-            Show all accounts in the system.
+        @account/list [online] [perm=<permission>] [order=<id|name|created>]
+            Show all accounts in the system, a page at a time. Only those
+            online or holding a Permission, if asked. Use order=-name (etc)
+            to reverse the order.
 
         @account/create <username>,<email>,<password>
             Create a new account.
 
-        @account/disable <account>=<reason>
+        @account/disable <account>[,<account>...]=<reason>
             Indefinitely disable an Account. The stated reason will be shown
             to staff and the account. If the account is currently online,
             it will be booted.
             Use @account/enable <account> to re-enable the account.
 
-        @account/ban <account>=<duration>,<reason>
+        @account/ban <account>[,<account>...]=<duration>,<reason>
             Temporarily disable an account until the timer's up. <duration>
             must be a time period such as 7d (7 days), 2w (2 weeks), etc.
             Reason will be shown to the account and staff and recorded.
@@ -45,8 +47,11 @@ class CmdAccount(AdministrationCommand):
         @account/password <account>=<new password>
             Re-set an Account's password.
 
-        @account/boot <account>=<reason>
+        @account/boot <account>[,<account>...]=<reason>
             Forcibly disconnect an Account.
+
+        Switches that accept several accounts at once (disable, enable,
+        ban, unban, boot) apply to all of them together.
     """
     key = '@account'
     locks = "cmd:pperm(Helper)"
@@ -72,7 +77,10 @@ class CmdAccount(AdministrationCommand):
         self.msg(self.controller.examine_account(self.session, self.args))
 
     def switch_list(self):
-        self.msg(self.controller.list_accounts(self.session))
+        options = self.list_options(online=False, perm=None, order='id')
+        self.msg_pages(self.controller.list_accounts(self.session, permission=options['perm'],
+                                                     online=True if options['online'] else None,
+                                                     order=options['order']))
 
     def switch_create(self):
         if not len(self.argslist) == 3:
@@ -81,11 +89,28 @@ class CmdAccount(AdministrationCommand):
         self.controller.create_account(self.session, username, email, password)
 
     def switch_disable(self):
+        if len(self.lhslist) > 1:
+            return self.controller.disable_accounts(self.session, self.lhslist, self.rhs)
         self.controller.disable_account(self.session, self.lhs, self.rhs)
 
     def switch_enable(self):
+        if len(self.lhslist) > 1:
+            return self.controller.enable_accounts(self.session, self.lhslist)
         self.controller.enable_account(self.session, self.lhs)
 
+    def switch_ban(self):
+        if not self.rhs:
+            self.syntax_error()
+        duration, _, reason = self.rhs.partition(',')
+        if len(self.lhslist) > 1:
+            return self.controller.ban_accounts(self.session, self.lhslist, duration.strip(), reason.strip())
+        self.controller.ban_account(self.session, self.lhs, duration.strip(), reason.strip())
+
+    def switch_unban(self):
+        if len(self.lhslist) > 1:
+            return self.controller.unban_accounts(self.session, self.lhslist)
+        self.controller.unban_account(self.session, self.lhs)
+
     def switch_password(self):
         self.controller.password_account(self.session, self.lhs, self.rhs)
 
@@ -93,6 +118,8 @@ class CmdAccount(AdministrationCommand):
         self.controller.email_account(self.session, self.lhs, self.rhs)
 
     def switch_boot(self):
+        if len(self.lhslist) > 1:
+            return self.controller.disconnect_accounts(self.session, self.lhslist, self.rhs)
         self.controller.disconnect_account(self.session, self.lhs, self.rhs)
 
 
@@ -104,8 +131,8 @@ class CmdAccess(AdministrationCommand):
         @access [<account>]
             Show the target's access details. Your own, if none is provided.
 
-        @access/grant <account>=<permission>
-            Grant an Evennia Permission to an Account.
+        @access/grant <account>[,<account>...]=<permission>
+            Grant an Evennia Permission to one or more Accounts.
             Use @access/revoke <account>=<permission> to remove it.
 
         @access/all
@@ -148,9 +175,13 @@ class CmdAccess(AdministrationCommand):
         self.msg(self.controller.access_account(self.session, account))
 
     def switch_grant(self):
+        if len(self.lhslist) > 1:
+            return self.controller.grant_permissions(self.session, self.lhslist, self.rhs)
         self.controller.grant_permission(self.session, self.lhs, self.rhs)
 
     def switch_revoke(self):
+        if len(self.lhslist) > 1:
+            return self.controller.revoke_permissions(self.session, self.lhslist, self.rhs)
         self.controller.revoke_permission(self.session, self.lhs, self.rhs)
 
     def switch_super(self):
@@ -173,8 +204,10 @@ class CmdCharacter(AdministrationCommand):
         @character <character>
             Examines a character and displays details.
 
-        @character/list
-            Lists all characters.
+        @character/list [online] [account=<account>] [order=<id|name|created>]
+            Lists all characters, a page at a time. Only those online or
+            belonging to an account, if asked. Use order=-name (etc) to
+            reverse the order.
 
         @character/create <account>=<character name>
             Creates a new character for <account>.
@@ -200,7 +233,7 @@ class CmdCharacter(AdministrationCommand):
             characters. You may need to target them by #DBREF instead of their
             name if there are multiple matches.
 
-        @character/old
+        @character/old [account=<account>] [order=<id|name|created>]
             List all archived characters.
     """
     key = '@character'
@@ -238,10 +271,15 @@ class CmdCharacter(AdministrationCommand):
         self.controller.transfer_character(self.session, self.lhs, self.rhs)
 
     def switch_old(self):
-        self.msg(self.controller.list_characters(self.session, archived=True))
+        options = self.list_options(account=None, order='id')
+        self.msg_pages(self.controller.list_characters(self.session, archived=True, account=options['account'],
+                                                       order=options['order']))
 
     def switch_list(self):
-        self.msg(self.controller.list_characters(self.session))
+        options = self.list_options(online=False, account=None, order='id')
+        self.msg_pages(self.controller.list_characters(self.session, account=options['account'],
+                                                       online=True if options['online'] else None,
+                                                       order=options['order']))
 
 
 class CmdAccRename(AdministrationCommand):
@@ -93,6 +93,54 @@ class AthanorCommand(MuxCommand):
     def error(self, msg, target=None):
         self.sys_msg(f"ERROR: {msg}", target=target)
 
+    def msg_pages(self, pages):
+        """
+        Sends each page of a listing as its own message, letting the server get on with other
+        work between pages.
+
+        Args:
+            pages (iterable of str): Probably a generator that renders each page on demand.
+
+        Returns:
+            task (CooperativeTask)
+        """
+        from twisted.internet import task
+
+        def send():
+            for page in pages:
+                self.msg(page)
+                yield
+
+        cooperative = task.cooperate(send())
+        cooperative.whenDone().addErrback(lambda failure: self.msg(f"ERROR: {failure.getErrorMessage()}"))
+        return cooperative
+
+    def list_options(self, **allowed):
+        """
+        Parses listing options such as 'online perm=Admin order=-name' from the args.
+        Options may be separated by spaces or commas.
+
+        Args:
+            **allowed: Option name -> default value. A bool default makes the option a flag.
+
+        Returns:
+            options (dict): Every allowed option, with the given value or its default.
+        """
+        options = dict(allowed)
+        for token in re.split(r"[\s,]+", self.args or ''):
+            if not token:
+                continue
+            name, _, value = token.partition('=')
+            if not (name := partial_match(name.lower(), allowed.keys())):
+                raise ValueError(f"Unknown option '{token}'. Choose from: {', '.join(allowed.keys())}")
+            if isinstance(allowed[name], bool):
+                options[name] = True
+            elif not value:
+                raise ValueError(f"Option '{name}' requires a value, like {name}=<value>")
+            else:
+                options[name] = value
+        return options
+
     def parse(self):
         """
         Re-implementation of MuxCommand parse(). Just adds/changes a few things.
@@ -169,12 +217,14 @@ class AthanorCommand(MuxCommand):
         """
         if not self.account:
             raise ValueError("Must be logged in to use this feature!")
-        candidates = self.controllers.get('character').all().filter(character_bridge__db_account=self.account,
-                                                                   character_bridge__db_namespace=0)
-        if not candidates:
-            raise ValueError("No characters to select from!")
-
-        results = object_search(char_name, exact=exact, candidates=candidates)
+        controller = self.controllers.get('character')
+        if not (results := controller.search_index(char_name, exact=exact, account=self.account)):
+            # Names are indexed, aliases are not. Fall back to the database for those.
+            candidates = controller.all().filter(character_bridge__db_account=self.account,
+                                                 character_bridge__db_namespace=0)
+            if not candidates:
+                raise ValueError("No characters to select from!")
+            results = object_search(char_name, exact=exact, candidates=candidates)
 
         if not results:
             raise ValueError(f"Cannot locate character named {char_name}!")
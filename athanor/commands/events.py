@@ -0,0 +1,95 @@
+import json
+
+from django.conf import settings
+
+from athanor.commands.command import AthanorCommand
+from athanor.utils.events import EVENT_MANAGER
+
+
+class CmdEvents(AthanorCommand):
+    """
+    Inspects the Global Event system's instrumentation.
+
+    Usage:
+        @events
+            Show how often each event fired and how long its listeners took.
+
+        @events/slow
+            Show the most recent listeners that exceeded the slow threshold.
+
+        @events/dump
+            Output everything collected as JSON.
+
+        @events/enable [<threshold>]
+            Begin collecting statistics. <threshold> is in seconds; listeners
+            slower than it will be logged. Discards previous statistics.
+
+        @events/disable
+            Stop collecting statistics.
+    """
+    key = '@events'
+    locks = "cmd:pperm(Developer)"
+    help_category = "System"
+    system_name = "EVENTS"
+    switch_options = ('slow', 'dump', 'enable', 'disable')
+
+    @property
+    def stats(self):
+        if not (stats := EVENT_MANAGER.stats):
+            raise ValueError("Event instrumentation is not enabled. Use @events/enable.")
+        return stats
+
+    def switch_main(self):
+        stats = self.stats
+        message = list()
+        message.append(self.styled_header(f"Event Statistics since {stats.started.strftime('%c')}"))
+        table = self.styled_table("Event", "Emits", "Calls", "Total ms", "Mean ms", "P95 ms", "Max ms")
+        for event, emits in sorted(stats.emits.items(), key=lambda x: x[1], reverse=True):
+            handlers = [h.dump() for h in stats.handlers[event].values()]
+            calls = sum(h['calls'] for h in handlers)
+            total = sum(h['total'] for h in handlers)
+            table.add_row(event, emits, calls, f"{total * 1000:.2f}", f"{(total / calls if calls else 0) * 1000:.2f}",
+                          f"{max((h['p95'] for h in handlers), default=0) * 1000:.2f}",
+                          f"{max((h['max'] for h in handlers), default=0) * 1000:.2f}")
+        message.append(table)
+        message.append(self.styled_separator("Slowest Listeners"))
+        table = self.styled_table("Listener", "Event", "Calls", "Total ms", "P50 ms", "P99 ms")
+        handlers = [(event, name, h.dump()) for event, names in stats.handlers.items() for name, h in names.items()]
+        for event, name, h in sorted(handlers, key=lambda x: x[2]['total'], reverse=True)[:20]:
+            table.add_row(name, event, h['calls'], f"{h['total'] * 1000:.2f}", f"{h['p50'] * 1000:.2f}",
+                          f"{h['p99'] * 1000:.2f}")
+        message.append(table)
+        message.append(self.blank_footer)
+        self.msg('\n'.join(str(l) for l in message))
+
+    def switch_slow(self):
+        stats = self.stats
+        if not stats.slow:
+            raise ValueError("No listeners have exceeded the slow threshold.")
+        message = list()
+        message.append(self.styled_header(f"Slow Listeners (over {stats.slow_threshold * 1000:.2f}ms)"))
+        table = self.styled_table("Time", "Event", "Listener", "ms")
+        for stamp, event, name, elapsed in reversed(stats.slow):
+            table.add_row(stamp.strftime('%X'), event, name, f"{elapsed * 1000:.2f}")
+        message.append(table)
+        message.append(self.blank_footer)
+        self.msg('\n'.join(str(l) for l in message))
+
+    def switch_dump(self):
+        self.msg(json.dumps(self.stats.dump(), indent=2, sort_keys=True))
+
+    def switch_enable(self):
+        threshold = settings.EVENT_SLOW_HANDLER_THRESHOLD
+        if self.args:
+            try:
+                threshold = float(self.args)
+            except ValueError:
+                raise ValueError("The threshold must be a number of seconds!")
+        EVENT_MANAGER.enable_stats(slow_threshold=threshold, max_samples=settings.EVENT_INSTRUMENTATION_SAMPLES)
+        self.sys_msg(f"Event instrumentation enabled. Slow threshold: {threshold}s")
+
+    def switch_disable(self):
+        if not EVENT_MANAGER.stats:
+            raise ValueError("Event instrumentation is not enabled.")
+        EVENT_MANAGER.disable_stats()
+        self.sys_msg("Event instrumentation disabled.")
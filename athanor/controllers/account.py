@@ -1,15 +1,23 @@
-import re
+import time
 from collections import defaultdict
 
 from django.conf import settings
+from django.db import transaction
 
-from evennia.utils.utils import class_from_module, make_iter, time_format, datetime_format
-from evennia.utils.logger import log_trace
+from evennia import SESSION_HANDLER
+from evennia.accounts.models import AccountDB
+from evennia.utils.utils import class_from_module, make_iter, time_format
+from evennia.utils.logger import log_trace, log_info
 from evennia.utils.search import search_account
 
 from athanor.controllers.base import AthanorController
 from athanor.gamedb.accounts import AthanorAccount
+from athanor.models import AccountEmail
 from athanor.messages import account as amsg
+from athanor.utils.matcher import NameMatcher
+from athanor.utils.indexes import PrefixIndex
+from athanor.utils import bulk
+from athanor.utils.pagination import iter_pages, render_pages
 from athanor.utils.text import partial_match, iter_to_string
 from athanor.utils.time import utcnow, duration_from_string
 
@@ -19,17 +27,73 @@ MIXINS.sort(key=lambda x: getattr(x, "mixin_priority", 0))
 
 class AthanorAccountController(*MIXINS, AthanorController):
     system_name = 'ACCOUNTS'
+    # The orderings list_accounts accepts, and the fields they sort by.
+    list_orders = {'id': 'id', 'name': 'username', 'created': 'date_joined'}
 
     def __init__(self, key, manager):
         AthanorController.__init__(self, key, manager)
         self.account_typeclass = None
         self.id_map = dict()
         self.name_map = dict()
+        self.name_index = PrefixIndex()
+        self.email_map = dict()
         self.roles = dict()
-        self.reg_names = None
-        self.permissions = defaultdict(set)
+        self.name_matcher = NameMatcher()
+        self._permissions = None
     
-    def do_load(self):
+    def gather(self, snapshot=None):
+        if snapshot is not None and snapshot.get('watermark', None) != self.watermark():
+            log_info(f"{self.__class__.__name__}: Snapshot is out of date. Rebuilding.")
+            snapshot = None
+        accounts = list(AthanorAccount.objects.filter_family())
+        if snapshot is not None:
+            return accounts, None, snapshot
+        grants = None
+        if len(accounts) <= settings.ACCOUNT_PERMISSION_INDEX_LAZY:
+            grants = list(self.permission_grants())
+        return accounts, grants, None
+
+    def watermark(self):
+        """
+        A digest of everything the snapshotted indexes are built from: every Account's id,
+        username, and superuser status, and every permission grant. Read as plain rows, so it's
+        cheap to check before any Accounts are loaded.
+
+        Returns:
+            watermark (str)
+        """
+        accounts = AccountDB.objects.order_by('id').values_list('id', 'username', 'is_superuser')
+        grants = AccountDB.db_tags.through.objects.filter(tag__db_tagtype='permission')
+        grants = grants.order_by('accountdb_id', 'tag__db_key').values_list('accountdb_id', 'tag__db_key')
+        return self.rows_digest(accounts, grants)
+
+    def snapshot(self):
+        return {
+            'watermark': self.watermark(),
+            'name_index': self.name_index.export(lambda acc: acc.id),
+            'name_matcher': self.name_matcher.export(),
+            'permissions': {perm: [acc.id for acc in accounts] for perm, accounts in self._permissions.items()}
+            if self._permissions is not None else None
+        }
+
+    def restore_snapshot(self, snapshot):
+        """
+        Restores the indexes saved by snapshot(). id_map must already be current.
+
+        Args:
+            snapshot (dict): The results of snapshot().
+
+        Raises:
+            KeyError if the snapshot refers to an Account that no longer exists.
+        """
+        id_map = self.id_map
+        self.name_index = PrefixIndex.rebuild(snapshot['name_index'], id_map.__getitem__)
+        self.name_matcher = NameMatcher.rebuild(snapshot['name_matcher'])
+        self._permissions = None
+        if (permissions := snapshot['permissions']) is not None:
+            self._permissions = defaultdict(set, {perm: {id_map[i] for i in ids} for perm, ids in permissions.items()})
+
+    def do_load(self, gathered=None):
         try:
             self.account_typeclass = class_from_module(settings.BASE_ACCOUNT_TYPECLASS,
                                                          defaultpaths=settings.TYPECLASS_PATHS)
@@ -37,23 +101,109 @@ class AthanorAccountController(*MIXINS, AthanorController):
             log_trace()
             self.account_typeclass = AthanorAccount
 
-        self.update_cache()
+        self.update_cache(gathered)
+        self.backfill_email_index()
 
-    def update_regex(self):
-        escape_names = [re.escape(name) for name in self.name_map.keys()]
-        self.reg_names = re.compile(r"(?i)\b(?P<found>%s)\b" % '|'.join(escape_names))
+    def update_name_matcher(self):
+        self.name_matcher = NameMatcher(self.name_map.keys())
 
-    def update_cache(self):
-        accounts = AthanorAccount.objects.filter_family()
+    def update_cache(self, gathered=None):
+        accounts, grants, snapshot = gathered if gathered else self.gather()
         self.id_map = {acc.id: acc for acc in accounts}
         self.name_map = {acc.username.upper(): acc for acc in accounts}
-        self.update_regex()
-        self.permissions = defaultdict(set)
-        for acc in accounts:
-            for perm in acc.permissions.all():
-                self.permissions[perm].add(acc)
+        self.email_map = dict()
+        # Where Accounts share an address, the oldest keeps it.
+        for acc in sorted(accounts, key=lambda acc: acc.id):
+            if acc.email:
+                self.email_map.setdefault(AccountEmail.normalize(acc.email), acc)
+        if snapshot is not None:
+            try:
+                self.restore_snapshot(snapshot)
+                return
+            except KeyError:
+                log_info(f"{self.__class__.__name__}: Snapshot refers to missing Accounts. Rebuilding.")
+        self.name_index = PrefixIndex((acc.username, acc) for acc in accounts)
+        self.update_name_matcher()
+        self._permissions = None
+        if grants is not None:
+            self._permissions = self.build_permissions(grants)
+
+    def backfill_email_index(self):
+        """
+        Creates the AccountEmail rows for Accounts that predate it, or were created without
+        going through create_account. Where existing Accounts share an address, only the
+        oldest, which is the one in email_map, keeps it in the index.
+
+        Returns:
+            None
+        """
+        indexed = set(AccountEmail.objects.values_list('db_account_id', flat=True))
+        missing = [AccountEmail(db_account_id=acc.id, db_email=email)
+                   for email, acc in self.email_map.items() if acc.id not in indexed]
+        if not missing:
+            return
+        AccountEmail.objects.bulk_create(missing, ignore_conflicts=True)
+        log_info(f"{self.__class__.__name__}: Indexed the email addresses of {len(missing)} Accounts.")
+
+    def check_email(self, email, account=None):
+        """
+        Raises ValueError if an email address belongs to an Account other than account.
+        Answered from memory. The database's unique index is the final word.
+        """
+        if (found := self.email_map.get(AccountEmail.normalize(email), None)) and found != account:
+            raise ValueError("Email is already in use by another account!")
+
+    @property
+    def permissions(self):
+        """
+        The permission index: permission -> set of Accounts. Superusers are indexed under '_super'.
+        On very large games it's built on first use instead of at load.
+        """
+        if self._permissions is None:
+            self._permissions = self.build_permissions()
+        return self._permissions
+
+    @permissions.setter
+    def permissions(self, value):
+        self._permissions = value
+
+    def permission_grants(self):
+        """
+        Every permission granted to every Account, from a single query against the Tags joined
+        to Accounts.
+
+        Returns:
+            grants (iterator of (account id, permission) tuples)
+        """
+        grants = AccountDB.db_tags.through.objects.filter(tag__db_tagtype='permission')
+        return grants.values_list('accountdb_id', 'tag__db_key').iterator()
+
+    def build_permissions(self, grants=None):
+        """
+        Builds the permission index from permission_grants(), rather than asking every Account
+        for its permissions.
+
+        Args:
+            grants (iterable or None): Previously retrieved permission_grants().
+
+        Returns:
+            permissions (defaultdict of sets)
+        """
+        start = time.perf_counter()
+        permissions = defaultdict(set)
+        if grants is None:
+            grants = self.permission_grants()
+        count = 0
+        for account_id, perm in grants:
+            if (acc := self.id_map.get(account_id, None)):
+                permissions[perm].add(acc)
+                count += 1
+        for acc in self.id_map.values():
             if acc.is_superuser:
-                self.permissions["_super"].add(acc)
+                permissions["_super"].add(acc)
+        log_info(f"{self.__class__.__name__}: Indexed {count} permission grants for {len(self.id_map)} "
+                 f"accounts in {time.perf_counter() - start:.3f} seconds.")
+        return permissions
 
     def create_account(self, session, username, email, password, login_screen=False, **kwargs):
         enactor = None
@@ -66,13 +216,18 @@ class AthanorAccountController(*MIXINS, AthanorController):
             raise ValueError("An Account must have an email address!")
         if not password:
             raise ValueError("An Account must have a password!")
+        self.check_email(email)
         new_account = self.account_typeclass.create_account(username=username, email=email, password=password,
                                                                 session=session, ip=session.address)
         self.id_map[new_account.id] = new_account
         self.name_map[new_account.username.upper()] = new_account
-        self.update_regex()
-        for perm in new_account.permissions.all():
-            self.permissions[perm].add(new_account)
+        self.name_matcher.add(new_account.username.upper())
+        self.name_index.add(new_account.username, new_account)
+        if new_account.email:
+            self.email_map[AccountEmail.normalize(new_account.email)] = new_account
+        if self._permissions is not None:
+            for perm in new_account.permissions.all():
+                self._permissions[perm].add(new_account)
         entities = {'enactor': enactor if enactor else session, 'account': new_account}
         if login_screen:
             amsg.CreateMessage(entities).send()
@@ -86,6 +241,11 @@ class AthanorAccountController(*MIXINS, AthanorController):
         account = self.find_account(account)
         old_name = str(account)
         new_name = account.rename(new_name)
+        self.name_map.pop(old_name.upper(), None)
+        self.name_matcher.remove(old_name.upper())
+        self.name_map[new_name.upper()] = account
+        self.name_matcher.add(new_name.upper())
+        self.name_index.move(old_name, new_name, account)
         entities = {'enactor': enactor, 'account': account}
         amsg.RenameMessage(entities, old_name=old_name).send()
 
@@ -93,22 +253,49 @@ class AthanorAccountController(*MIXINS, AthanorController):
         if not (enactor := session.get_account()) or (not ignore_priv and not enactor.check_lock("pperm(Admin)")):
             raise ValueError("Permission denied.")
         account = self.find_account(account)
+        if not new_email:
+            raise ValueError("Must set an email address!")
+        self.check_email(new_email, account=account)
         old_email = account.email
         new_email = account.set_email(new_email)
+        if old_email and self.email_map.get(AccountEmail.normalize(old_email), None) == account:
+            del self.email_map[AccountEmail.normalize(old_email)]
+        self.email_map[AccountEmail.normalize(new_email)] = account
         entities = {'enactor': enactor, 'account': account}
         amsg.EmailMessage(entities, old_email=old_email).send()
 
     def find_account(self, search_text, exact=False):
+        """
+        Locates an Account by username, partial username, email address, or #dbref.
+        Answered from the Controller's indexes. The database is only consulted for misses.
+
+        Args:
+            search_text (str or AthanorAccount): What to look for.
+            exact (bool): Don't consider partial usernames.
+
+        Returns:
+            account (AthanorAccount)
+        """
         if not search_text:
             raise ValueError("No account entered to search for!")
         if isinstance(search_text, AthanorAccount):
             return search_text
+        search_text = search_text.strip()
+        if search_text.startswith('#') and search_text[1:].isdigit():
+            if (found := self.id_map.get(int(search_text[1:]), None)):
+                return found
+            if (found := AthanorAccount.objects.filter_family(id=int(search_text[1:])).first()):
+                return found
+            raise ValueError(f"Cannot find a user with dbref: {search_text}")
         if '@' in search_text:
+            if (found := self.email_map.get(AccountEmail.normalize(search_text), None)):
+                return found
             found = AthanorAccount.objects.get_account_from_email(search_text).first()
             if found:
                 return found
             raise ValueError(f"Cannot find a user with email address: {search_text}")
-        found = search_account(search_text, exact=exact)
+        if not (found := self.name_index.find(search_text, exact=exact)):
+            found = search_account(search_text, exact=exact)
         if len(found) == 1:
             return found[0]
         if not found:
@@ -192,6 +379,146 @@ class AthanorAccountController(*MIXINS, AthanorController):
         amsg.ForceDisconnect(entities, reason=reason).send()
         account.force_disconnect(reason=reason)
 
+    def find_accounts(self, search_texts, exact=False):
+        """
+        Locates many Accounts at once. Every one must be found.
+
+        Args:
+            search_texts (iterable): Anything find_account accepts.
+            exact (bool): Don't consider partial usernames.
+
+        Returns:
+            accounts (list): Without duplicates, in the order given.
+        """
+        found = dict()
+        errors = list()
+        for search_text in search_texts:
+            try:
+                account = self.find_account(search_text, exact=exact)
+                found[account.id] = account
+            except ValueError as err:
+                errors.append(str(err))
+        if errors:
+            raise ValueError(' '.join(errors))
+        if not found:
+            raise ValueError("No accounts entered to search for!")
+        return list(found.values())
+
+    def boot_sessions(self, accounts, reason=""):
+        """
+        Forcibly disconnects every session belonging to accounts in a single pass over the
+        connected sessions.
+
+        Args:
+            accounts (iterable): Accounts to boot.
+            reason (str): Shown to the Accounts.
+
+        Returns:
+            None
+        """
+        ids = {acc.id for acc in accounts}
+        targets = [sess for sess in SESSION_HANDLER.values() if sess.logged_in and sess.uid in ids]
+        for acc in {sess.account for sess in targets if sess.account}:
+            acc.unpuppet_all()
+        for sess in targets:
+            SESSION_HANDLER.disconnect(sess, reason=reason)
+
+    def batch_message(self, message_class, enactor, accounts, **kwargs):
+        entities = {'enactor': enactor, 'accounts': list(accounts)}
+        message_class(entities, count=len(accounts), account_names=iter_to_string(accounts), **kwargs).send()
+
+    def disable_accounts(self, session, accounts, reason):
+        """
+        Disables many Accounts in one transaction. Accounts already disabled are skipped.
+
+        Args:
+            session (ServerSession): The Session doing this.
+            accounts (iterable): Anything find_account accepts.
+            reason (str): Shown to staff and the Accounts.
+
+        Returns:
+            accounts (list): The Accounts that were disabled.
+        """
+        if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Admin)"):
+            raise ValueError("Permission denied.")
+        if not reason:
+            raise ValueError("Must include a reason!")
+        accounts = self.find_accounts(accounts)
+        disabled = bulk.attribute_holders(accounts, '_disabled')
+        if not (accounts := [acc for acc in accounts if acc.id not in disabled]):
+            raise ValueError("Those Accounts are already disabled!")
+        with transaction.atomic():
+            bulk.set_attributes(accounts, {'_disabled': reason})
+        bulk.reset_caches(accounts)
+        self.batch_message(amsg.BatchDisableMessage, enactor, accounts, reason=reason)
+        self.boot_sessions(accounts, reason)
+        return accounts
+
+    def enable_accounts(self, session, accounts):
+        if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Admin)"):
+            raise ValueError("Permission denied.")
+        accounts = self.find_accounts(accounts)
+        disabled = bulk.attribute_holders(accounts, '_disabled')
+        if not (accounts := [acc for acc in accounts if acc.id in disabled]):
+            raise ValueError("None of those Accounts are disabled!")
+        with transaction.atomic():
+            bulk.delete_attributes(accounts, ['_disabled'])
+        bulk.reset_caches(accounts)
+        self.batch_message(amsg.BatchEnableMessage, enactor, accounts)
+        return accounts
+
+    def ban_accounts(self, session, accounts, duration, reason):
+        """
+        Bans many Accounts in one transaction. Existing bans are replaced.
+
+        Args:
+            session (ServerSession): The Session doing this.
+            accounts (iterable): Anything find_account accepts.
+            duration (str): A time period such as 7d.
+            reason (str): Shown to staff and the Accounts.
+
+        Returns:
+            accounts (list): The Accounts that were banned.
+        """
+        if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Moderator)"):
+            raise ValueError("Permission denied.")
+        accounts = self.find_accounts(accounts)
+        duration = duration_from_string(duration)
+        ban_date = utcnow() + duration
+        if not reason:
+            raise ValueError("Must include a reason!")
+        with transaction.atomic():
+            bulk.set_attributes(accounts, {'_banned': ban_date, '_ban_reason': reason})
+        bulk.reset_caches(accounts)
+        self.batch_message(amsg.BatchBanMessage, enactor, accounts,
+                           duration=time_format(duration.total_seconds(), style=2),
+                           ban_date=ban_date.strftime('%c'), reason=reason)
+        self.boot_sessions(accounts, reason)
+        return accounts
+
+    def unban_accounts(self, session, accounts):
+        if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Moderator)"):
+            raise ValueError("Permission denied.")
+        accounts = self.find_accounts(accounts)
+        banned = bulk.attribute_holders(accounts, '_banned')
+        if not (accounts := [acc for acc in accounts if acc.id in banned]):
+            raise ValueError("None of those Accounts are banned!")
+        with transaction.atomic():
+            bulk.delete_attributes(accounts, ['_banned', '_ban_reason'])
+        bulk.reset_caches(accounts)
+        self.batch_message(amsg.BatchUnBanMessage, enactor, accounts)
+        return accounts
+
+    def disconnect_accounts(self, session, accounts, reason):
+        if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Moderator)"):
+            raise ValueError("Permission denied.")
+        accounts = self.find_accounts(accounts)
+        if not (accounts := [acc for acc in accounts if acc.db_is_connected]):
+            raise ValueError("None of those Accounts are connected!")
+        self.batch_message(amsg.BatchForceDisconnect, enactor, accounts, reason=reason)
+        self.boot_sessions(accounts, reason)
+        return accounts
+
     def find_permission(self, perm):
         if not perm:
             raise ValueError("No permission entered!")
@@ -199,11 +526,10 @@ class AthanorAccountController(*MIXINS, AthanorController):
             raise ValueError("Permission not found!")
         return found
 
-    def grant_permission(self, session, account, perm):
-        if not (enactor := session.get_account()):
-            raise ValueError("Permission denied.")
-        account = self.find_account(account)
-        perm = self.find_permission(perm)
+    def check_permission_lock(self, enactor, perm):
+        """
+        Raises ValueError unless enactor may grant and revoke perm.
+        """
         perm_data = settings.PERMISSIONS.get(perm, dict())
         perm_lock = perm_data.get("permission", None)
         if not perm_lock:
@@ -216,6 +542,13 @@ class AthanorAccountController(*MIXINS, AthanorController):
                     break
             if not passed:
                 raise ValueError(f"Permission denied. Requires {perm_lock} or better.")
+
+    def grant_permission(self, session, account, perm):
+        if not (enactor := session.get_account()):
+            raise ValueError("Permission denied.")
+        account = self.find_account(account)
+        perm = self.find_permission(perm)
+        self.check_permission_lock(enactor, perm)
         if perm.lower() in account.permissions.all():
             raise ValueError(f"{account} already has that Permission!")
         account.permissions.add(perm)
@@ -228,25 +561,58 @@ class AthanorAccountController(*MIXINS, AthanorController):
             raise ValueError("Permission denied.")
         account = self.find_account(account)
         perm = self.find_permission(perm)
-        perm_data = settings.PERMISSIONS.get(perm, dict())
-        perm_lock = perm_data.get("permission", None)
-        if not perm_lock:
-            if not enactor.is_superuser:
-                raise ValueError("Permission denied. Only a Superuser can grant this.")
-        if perm_lock:
-            passed = False
-            for lock in make_iter(perm_lock):
-                if (passed := enactor.check_lock(f"pperm({lock})")):
-                    break
-            if not passed:
-                raise ValueError(f"Permission denied. Requires {perm_lock} or better.")
+        self.check_permission_lock(enactor, perm)
         if perm.lower() not in account.permissions.all():
             raise ValueError(f"{account} does not have that Permission!")
         account.permissions.remove(perm)
-        self.permissions[perm.lower()].remove(account)
+        self.permissions[perm.lower()].discard(account)
         entities = {'enactor': enactor, 'account': account}
         amsg.RevokeMessage(entities, perm=perm).send()
 
+    def grant_permissions(self, session, accounts, perm):
+        """
+        Grants a Permission to many Accounts with bulk Tag writes. Accounts that already hold it
+        are skipped.
+
+        Args:
+            session (ServerSession): The Session doing this.
+            accounts (iterable): Anything find_account accepts.
+            perm (str): The Permission to grant.
+
+        Returns:
+            accounts (list): The Accounts that were granted perm.
+        """
+        if not (enactor := session.get_account()):
+            raise ValueError("Permission denied.")
+        perm = self.find_permission(perm)
+        self.check_permission_lock(enactor, perm)
+        accounts = self.find_accounts(accounts)
+        holders = self.permissions[perm.lower()]
+        if not (accounts := [acc for acc in accounts if acc not in holders]):
+            raise ValueError("Those Accounts already have that Permission!")
+        with transaction.atomic():
+            bulk.add_tag(accounts, perm, tagtype='permission')
+        bulk.reset_caches(accounts)
+        holders.update(accounts)
+        self.batch_message(amsg.BatchGrantMessage, enactor, accounts, perm=perm)
+        return accounts
+
+    def revoke_permissions(self, session, accounts, perm):
+        if not (enactor := session.get_account()):
+            raise ValueError("Permission denied.")
+        perm = self.find_permission(perm)
+        self.check_permission_lock(enactor, perm)
+        accounts = self.find_accounts(accounts)
+        holders = self.permissions[perm.lower()]
+        if not (accounts := [acc for acc in accounts if acc in holders]):
+            raise ValueError("None of those Accounts have that Permission!")
+        with transaction.atomic():
+            bulk.remove_tag(accounts, perm, tagtype='permission')
+        bulk.reset_caches(accounts)
+        holders.difference_update(accounts)
+        self.batch_message(amsg.BatchRevokeMessage, enactor, accounts, perm=perm)
+        return accounts
+
     def toggle_super(self, session, account):
         if not (enactor := session.get_account()) or not enactor.is_superuser:
             raise ValueError("Permission denied.")
@@ -263,7 +629,7 @@ class AthanorAccountController(*MIXINS, AthanorController):
         if reverse:
             self.permissions["_super"].add(account)
         else:
-            self.permissions["_super"].remove(account)
+            self.permissions["_super"].discard(account)
         return reverse
     
     def access_account(self, session, account):
@@ -314,19 +680,35 @@ class AthanorAccountController(*MIXINS, AthanorController):
         message.append(styling.blank_footer)
         return '\n'.join(str(l) for l in message)
 
-    def list_accounts(self, session):
+    def list_accounts(self, session, permission=None, online=None, order='id', page_size=None):
+        """
+        Lists Accounts a page at a time. Filtering and ordering happen in the database.
+
+        Args:
+            session (ServerSession): The Session asking.
+            permission (str or None): Only list Accounts holding this Permission.
+            online (bool or None): If set, only list Accounts that are (or are not) connected.
+            order (str): One of list_orders. Prefix with - to reverse it.
+            page_size (int or None): Accounts per page. Defaults to settings.LIST_PAGE_SIZE.
+
+        Returns:
+            pages (generator of str): Rendered pages, meant to be sent as they're produced.
+        """
         if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Admin)"):
             raise ValueError("Permission denied.")
-        if not (accounts := AthanorAccount.objects.filter_family()):
+        if not (field := self.list_orders.get(order.lstrip('-').lower(), None)):
+            raise ValueError(f"Accounts can be ordered by: {', '.join(self.list_orders.keys())}")
+        accounts = AthanorAccount.objects.filter_family()
+        if permission:
+            accounts = accounts.filter(db_tags__db_key=permission.lower(), db_tags__db_tagtype='permission')
+        if online is not None:
+            accounts = accounts.filter(db_is_connected=online)
+        if not accounts.exists():
             raise ValueError("No accounts to list!")
         styling = enactor.styler
-        message = [
-            styling.styled_header(f"Account Listing")
-        ]
-        for acc in accounts:
-            message.extend(acc.render_list_section(enactor, styling))
-        message.append(styling.blank_footer)
-        return '\n'.join(str(l) for l in message)
+        pages = iter_pages(accounts, page_size or settings.LIST_PAGE_SIZE, f"{'-' if order.startswith('-') else ''}{field}")
+        return render_pages(pages, styling.styled_header("Account Listing"), styling.blank_footer,
+                            lambda acc: acc.render_list_section(enactor, styling))
 
     def examine_account(self, session, account):
         if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Admin)"):
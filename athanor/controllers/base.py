@@ -1,11 +1,22 @@
-from django.conf import settings
+import hashlib
+import inspect
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from django.conf import settings
+from django.db import connection
 
 from evennia.utils.utils import class_from_module
+from evennia.utils.logger import log_info, log_trace
 
 from athanor.utils.online import admin_accounts
 from athanor.utils.events import EventEmitter
 
+# Bumped whenever the layout of a snapshot changes, so that old snapshots are ignored.
+SNAPSHOT_VERSION = 2
+
 MANAGER_MIXINS = [class_from_module(mixin) for mixin in settings.CONTROLLER_MIXINS["CONTROLLER_MANAGER"]]
 MANAGER_MIXINS.sort(key=lambda x: getattr(x, "mixin_priority", 0))
 
@@ -34,9 +45,171 @@ class ControllerManager(*MANAGER_MIXINS, EventEmitter):
             found.load()
         return found
 
+    def load_order(self):
+        """
+        Sorts the Controllers into levels by their load_dependencies. Every Controller in a level
+        depends only on Controllers in earlier levels, so a level's Controllers with
+        threaded_gather can be gathered at the same time.
+
+        Returns:
+            levels (list of lists of str): Controller keys.
+        """
+        remaining = {key: set(controller.load_dependencies) for key, controller in self.controllers.items()}
+        for key, dependencies in remaining.items():
+            if (missing := dependencies - set(remaining)):
+                raise ValueError(f"Controller {key} depends on unknown Controllers: {', '.join(sorted(missing))}")
+        levels = list()
+        done = set()
+        while remaining:
+            if not (ready := sorted(key for key, dependencies in remaining.items() if dependencies <= done)):
+                raise ValueError(f"Controller dependencies are circular among: {', '.join(sorted(remaining))}")
+            for key in ready:
+                del remaining[key]
+            done.update(ready)
+            levels.append(ready)
+        return levels
+
+    def save_snapshot(self, path):
+        """
+        Writes the index state of every loaded Controller that supports it to a file, so that
+        the next process can restore it instead of rebuilding it.
+
+        Args:
+            path (str): The file to write.
+
+        Returns:
+            None
+        """
+        started = time.perf_counter()
+        state = dict()
+        for key, controller in self.controllers.items():
+            if not controller.loaded:
+                continue
+            try:
+                if (found := controller.snapshot()) is not None:
+                    state[key] = found
+            except Exception:
+                log_trace()
+        if not state:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as snapshot_file:
+            pickle.dump({'version': SNAPSHOT_VERSION, 'created': time.time(), 'controllers': state},
+                        snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        log_info(f"{self.__class__.__name__}: Saved a snapshot of {', '.join(state.keys())} in "
+                 f"{time.perf_counter() - started:.3f} seconds.")
+
+    @staticmethod
+    def read_snapshot(path, max_age):
+        """
+        Reads and deletes a file written by save_snapshot(). A snapshot is only ever trusted for
+        the restart that immediately follows it.
+
+        Args:
+            path (str): The file to read.
+            max_age (float): Snapshots older than this many seconds are ignored.
+
+        Returns:
+            snapshot (dict or None): Controller key -> state.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as snapshot_file:
+                data = pickle.load(snapshot_file)
+        except Exception:
+            log_trace()
+            return None
+        finally:
+            os.remove(path)
+        if not isinstance(data, dict) or data.get('version', None) != SNAPSHOT_VERSION:
+            return None
+        if time.time() - data.get('created', 0) > max_age:
+            return None
+        return data.get('controllers', None)
+
+    @staticmethod
+    def gather_controller(controller, threaded=False, snapshot=None):
+        """
+        Runs a Controller's gather() and times it. In a worker thread, the thread's database
+        connection is closed afterwards so that it isn't leaked.
+
+        Returns:
+            gathered (any), elapsed (float)
+        """
+        started = time.perf_counter()
+        try:
+            return controller.gather(snapshot=snapshot), time.perf_counter() - started
+        finally:
+            if threaded:
+                connection.close()
+
+    def warm_up(self, threads=None, snapshot=None):
+        """
+        Loads every Controller now instead of waiting for the first get(). Within each level of
+        the load order, Controllers with threaded_gather run gather() in a thread pool while the
+        rest gather on the calling thread, then every do_load() runs in order on the calling
+        thread. A per-Controller timing breakdown is logged.
+
+        Args:
+            threads (int or None): Worker threads to use. Defaults to settings.CONTROLLER_WARMUP_THREADS.
+                1 or less gathers serially.
+            snapshot (dict or None): The results of read_snapshot(), if warm-restarting.
+
+        Returns:
+            timings (dict): Controller key -> (gather seconds, load seconds).
+        """
+        if not self.loaded:
+            self.load()
+        if threads is None:
+            threads = settings.CONTROLLER_WARMUP_THREADS
+        if snapshot is None:
+            snapshot = dict()
+        timings = dict()
+        started = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='controller') if threads > 1 else None
+        try:
+            for level in self.load_order():
+                pending = [controller for key in level if not (controller := self.controllers[key]).loaded]
+                futures = dict()
+                if pool and len(pending) > 1:
+                    futures = {controller.key: pool.submit(self.gather_controller, controller, True,
+                                                           snapshot.get(controller.key, None))
+                               for controller in pending if controller.threaded_gather}
+                for controller in pending:
+                    try:
+                        if (future := futures.get(controller.key, None)):
+                            gathered, gather_time = future.result()
+                        else:
+                            gathered, gather_time = self.gather_controller(
+                                controller, snapshot=snapshot.get(controller.key, None))
+                    except Exception:
+                        # Let the Controller gather for itself on this thread instead.
+                        log_trace()
+                        gathered, gather_time = None, 0.0
+                    load_started = time.perf_counter()
+                    controller.load(gathered)
+                    timings[controller.key] = (gather_time, time.perf_counter() - load_started)
+        finally:
+            if pool:
+                pool.shutdown()
+        report = ', '.join(f"{key} ({gather_time:.3f}s gather, {load_time:.3f}s load)"
+                           for key, (gather_time, load_time) in timings.items())
+        log_info(f"{self.__class__.__name__}: {'Warm-restarted' if snapshot else 'Warmed up'} {len(timings)} Controllers in "
+                 f"{time.perf_counter() - started:.3f} seconds using {max(threads, 1)} threads: {report}")
+        return timings
+
 
 class AthanorController(*BASE_MIXINS, EventEmitter):
     system_name = 'SYSTEM'
+    # Keys of Controllers that must finish loading before this one begins.
+    load_dependencies = tuple()
+    # Whether gather() may run in a worker thread during warm_up. Evennia's idmapper and
+    # typeclass caches aren't thread-safe, so only enable this if gather() creates no
+    # typeclassed objects, for instance if it only reads files or plain values() rows.
+    threaded_gather = False
 
     def __init__(self, key, manager):
         self.key = key
@@ -50,20 +223,79 @@ class AthanorController(*BASE_MIXINS, EventEmitter):
     def msg_target(self, message, target):
         target.msg(message, system_alert=self.system_name)
 
-    def load(self):
+    def load(self, gathered=None):
         """
         This is a wrapper around do_load that prevents it from being called twice.
 
+        Args:
+            gathered (any): The results of gather(), if it was already called elsewhere.
+                If None, gather() is called now.
+
         Returns:
             None
         """
         if self.loaded:
             return
-        self.do_load()
+        if gathered is None:
+            gathered = self.gather()
+        if inspect.signature(self.do_load).parameters:
+            self.do_load(gathered)
+        else:
+            # An override from before gather() existed.
+            self.do_load()
         self.loaded = True
 
-    def do_load(self):
+    def gather(self, snapshot=None):
         """
-        Implements the actual logic of loading. Meant to be overloaded.
+        Retrieves whatever do_load needs from the database or disk. If threaded_gather is set,
+        this runs in a worker thread during warm-up, alongside other Controllers, so it must not
+        modify this Controller or touch any other one. Meant to be overloaded.
+
+        Args:
+            snapshot (any): What snapshot() returned in the previous process, if warm-restarting.
+                It must be checked against the database before it's trusted.
+
+        Returns:
+            gathered (any): Passed to do_load.
+        """
+        return None
+
+    @staticmethod
+    def rows_digest(*querysets):
+        """
+        Hashes plain database rows, for telling whether anything a snapshot was built from has
+        changed without creating typeclass instances.
+
+        Args:
+            *querysets (QuerySet): values_list() querysets, each with a stable order.
+
+        Returns:
+            digest (str)
+        """
+        digest = hashlib.sha1()
+        for queryset in querysets:
+            for row in queryset.iterator():
+                digest.update(repr(row).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def snapshot(self):
+        """
+        Produces a picklable copy of this Controller's index state, to be handed to gather() by
+        the next process. Typeclass instances don't survive a restart, so refer to them by id.
+        Meant to be overloaded.
+
+        Returns:
+            state (any): None if this Controller doesn't support snapshots.
+        """
+        return None
+
+    def do_load(self, gathered=None):
+        """
+        Implements the actual logic of loading. Meant to be overloaded. Overrides that take no
+        arguments are still supported, and do their own gathering.
+
+        Args:
+            gathered (any): The results of gather().
         """
         pass
@@ -1,14 +1,19 @@
-import re
+from collections import defaultdict
+
 from django.conf import settings
+from django.db import transaction
 
 from evennia.utils.utils import class_from_module
-from evennia.utils.logger import log_trace
+from evennia.utils.logger import log_trace, log_info
 from evennia.utils.search import object_search
 
 from athanor.controllers.base import AthanorController
 from athanor.gamedb.characters import AthanorPlayerCharacter
 
 from athanor.messages import character as cmsg
+from athanor.utils.matcher import NameMatcher
+from athanor.utils.indexes import PrefixIndex
+from athanor.utils.pagination import iter_pages, render_pages
 
 MIXINS = [class_from_module(mixin) for mixin in settings.CONTROLLER_MIXINS["CHARACTER"]]
 MIXINS.sort(key=lambda x: getattr(x, "mixin_priority", 0))
@@ -16,19 +21,66 @@ MIXINS.sort(key=lambda x: getattr(x, "mixin_priority", 0))
 
 class AthanorCharacterController(*MIXINS, AthanorController):
     system_name = 'CHARACTERS'
+    # The orderings list_characters accepts, and the fields they sort by.
+    list_orders = {'id': 'id', 'name': 'db_key', 'created': 'db_date_created'}
 
     def __init__(self, key, manager):
         AthanorController.__init__(self, key, manager)
         self.character_typeclass = None
         self.id_map = dict()
         self.name_map = dict()
+        self.name_indexes = defaultdict(PrefixIndex)
+        self.inames = dict()
         self.online = set()
-        self.on_global("character_online", self.at_character_online)
-        self.on_global("character_offline", self.at_character_offline)
-        self.reg_names = None
-        self.load()
+        self.on_global("character_online", self.at_character_online, sender_class=AthanorPlayerCharacter)
+        self.on_global("character_offline", self.at_character_offline, sender_class=AthanorPlayerCharacter)
+        self.name_matcher = NameMatcher()
+
+    def gather(self, snapshot=None):
+        if snapshot is not None and snapshot.get('watermark', None) != self.watermark():
+            log_info(f"{self.__class__.__name__}: Snapshot is out of date. Rebuilding.")
+            snapshot = None
+        chars = AthanorPlayerCharacter.objects.filter_family(character_bridge__isnull=False)
+        return list(chars.select_related('character_bridge')), snapshot
+
+    def watermark(self):
+        """
+        A digest of everything the snapshotted indexes are built from: every Character's id,
+        name, and namespace. Read as plain rows, so it's cheap to check before any Characters
+        are loaded.
+
+        Returns:
+            watermark (str)
+        """
+        chars = AthanorPlayerCharacter.objects.filter_family(character_bridge__isnull=False)
+        return self.rows_digest(chars.order_by('id').values_list('id', 'db_key', 'character_bridge__db_namespace'))
+
+    def snapshot(self):
+        return {
+            'watermark': self.watermark(),
+            'name_indexes': {namespace: index.export(lambda char: char.id)
+                             for namespace, index in self.name_indexes.items()},
+            'name_matcher': self.name_matcher.export()
+        }
+
+    def restore_snapshot(self, chars, snapshot):
+        """
+        Restores the indexes saved by snapshot().
 
-    def do_load(self):
+        Args:
+            chars (list): Every Character with a bridge.
+            snapshot (dict): The results of snapshot().
+
+        Raises:
+            KeyError if the snapshot refers to a Character that no longer exists.
+        """
+        all_chars = {char.id: char for char in chars}
+        self.name_indexes = defaultdict(PrefixIndex)
+        for namespace, exported in snapshot['name_indexes'].items():
+            self.name_indexes[namespace] = PrefixIndex.rebuild(exported, all_chars.__getitem__)
+        self.name_matcher = NameMatcher.rebuild(snapshot['name_matcher'])
+
+    def do_load(self, gathered=None):
         try:
             self.character_typeclass = class_from_module(settings.BASE_CHARACTER_TYPECLASS,
                                                            defaultpaths=settings.TYPECLASS_PATHS)
@@ -36,11 +88,10 @@ class AthanorCharacterController(*MIXINS, AthanorController):
             log_trace()
             self.character_typeclass = AthanorPlayerCharacter
 
-        self.update_cache()
+        self.update_cache(gathered)
 
-    def update_regex(self):
-        escape_names = [re.escape(name) for name in self.name_map.keys()]
-        self.reg_names = re.compile(r"(?i)\b(?P<found>%s)\b" % '|'.join(escape_names))
+    def update_name_matcher(self):
+        self.name_matcher = NameMatcher(self.name_map.keys())
 
     def at_character_online(self, sender, **kwargs):
         self.online.add(sender)
@@ -48,19 +99,99 @@ class AthanorCharacterController(*MIXINS, AthanorController):
     def at_character_offline(self, sender, **kwargs):
         self.online.remove(sender)
 
-    def update_cache(self):
-        chars = AthanorPlayerCharacter.objects.filter_family(character_bridge__db_namespace=0)
-        self.id_map = {char.id: char for char in chars}
-        self.name_map = {char.key.upper(): char for char in chars}
-        self.online = set(chars.exclude(db_account=None))
+    def update_cache(self, gathered=None):
+        chars, snapshot = gathered if gathered else self.gather()
+        namespaces = defaultdict(list)
+        for char in chars:
+            namespaces[char.character_bridge.db_namespace].append(char)
+        active = namespaces[0]
+        self.id_map = {char.id: char for char in active}
+        self.name_map = {char.key.upper(): char for char in active}
+        self.online = {char for char in active if char.db_account_id}
+        self.inames = {(namespace, char.character_bridge.db_iname): char
+                       for namespace, members in namespaces.items() if namespace is not None for char in members}
+        if snapshot is not None:
+            try:
+                self.restore_snapshot(chars, snapshot)
+                return
+            except KeyError:
+                log_info(f"{self.__class__.__name__}: Snapshot refers to missing Characters. Rebuilding.")
+        self.update_name_matcher()
+        self.name_indexes = defaultdict(PrefixIndex)
+        for namespace, members in namespaces.items():
+            self.name_indexes[namespace] = PrefixIndex((char.key, char) for char in members)
 
     def all(self):
         return AthanorPlayerCharacter.objects.filter_family()
 
+    def check_name(self, name, namespace=0, character=None):
+        """
+        Raises ValueError if a name is malformed or used by another Character in the namespace.
+        Answered from memory. The database's unique constraint is the final guard.
+
+        Args:
+            name (str): The prospective name.
+            namespace (int or None): The namespace it must be unique in. None is never checked.
+            character (AthanorPlayerCharacter or None): The Character being renamed, if any.
+
+        Returns:
+            None
+        """
+        key, clean_key = self.character_typeclass.validate_name(name)
+        if namespace is None:
+            return
+        if (found := self.inames.get((namespace, clean_key.lower()), None)) and found != character:
+            raise ValueError("Name conflicts with another Character.")
+
+    def update_iname(self, character, old=None):
+        """
+        Re-indexes a Character's (namespace, iname) once the change that prompted it has been
+        committed to the database. Outside of a transaction, that's right away.
+
+        Args:
+            character (AthanorPlayerCharacter): The Character whose bridge changed.
+            old (tuple or None): The (namespace, iname) it was indexed under before.
+
+        Returns:
+            None
+        """
+        def update():
+            if old and self.inames.get(old, None) == character:
+                del self.inames[old]
+            bridge = character.character_bridge
+            if bridge.db_namespace is not None:
+                self.inames[(bridge.db_namespace, bridge.db_iname)] = character
+        transaction.on_commit(update)
+
+    def search_index(self, name, namespace=0, exact=False, account=None):
+        """
+        Searches the in-memory name index of a namespace. An exact name beats partial matches.
+
+        Args:
+            name (str): The name, partial name, or #dbref to look for.
+            namespace (int or None): 0 for active characters, None for archived ones.
+            exact (bool): Don't consider partial matches.
+            account (AccountDB or None): Only consider characters owned by this Account.
+
+        Returns:
+            results (list)
+        """
+        condition = None
+        if account is not None:
+            condition = lambda char: char.character_bridge.db_account_id == account.id
+        name = name.strip()
+        if name.startswith('#') and name[1:].isdigit():
+            if namespace != 0 or not (found := self.id_map.get(int(name[1:]), None)):
+                return list()
+            return [found] if condition is None or condition(found) else list()
+        if namespace not in self.name_indexes:
+            return list()
+        return self.name_indexes[namespace].find(name, exact=exact, condition=condition)
+
     def search_all(self, name, exact=False, candidates=None):
         if candidates is None:
             candidates = self.all()
-        return object_search(name, exact=exact, candidates=self.all())
+        return object_search(name, exact=exact, candidates=candidates)
 
     def archived(self):
         return self.all().filter(character_bridge__db_namespace=None)
@@ -71,7 +202,8 @@ class AthanorCharacterController(*MIXINS, AthanorController):
     def find_character(self, character, archived=False):
         if isinstance(character, AthanorPlayerCharacter):
             return character
-        results = self.search_all(character) if not archived else self.search_archived(character)
+        if not (results := self.search_index(character, namespace=None if archived else 0)):
+            results = self.search_all(character) if not archived else self.search_archived(character)
         if not results:
             raise ValueError(f"Cannot locate character named {character}!")
         if len(results) == 1:
@@ -84,11 +216,15 @@ class AthanorCharacterController(*MIXINS, AthanorController):
         if not (enactor := session.get_account()) or (not ignore_priv and not enactor.check_lock("oper(character_create)")):
             raise ValueError("Permission denied.")
         account = self.manager.get('account').find_account(account)
+        self.check_name(character_name, namespace=namespace)
         new_character = self.character_typeclass.create_character(character_name, account, namespace=namespace)
+        self.update_iname(new_character)
         new_character.db.account = account
         if namespace == 0:
             self.id_map[new_character.id] = new_character
             self.name_map[new_character.key.upper()] = new_character
+            self.name_matcher.add(new_character.key.upper())
+        self.name_indexes[namespace].add(new_character.key, new_character)
         entities = {'enactor': enactor, 'character': new_character, 'account': account}
         cmsg.CreateMessage(entities).send()
         return new_character
@@ -98,7 +234,14 @@ class AthanorCharacterController(*MIXINS, AthanorController):
             raise ValueError("Permission denied.")
         character = self.find_character(character)
         account = character.character_bridge.account
+        old_iname = (character.character_bridge.db_namespace, character.character_bridge.db_iname)
         character.archive()
+        self.update_iname(character, old=old_iname)
+        self.id_map.pop(character.id, None)
+        self.name_map.pop(character.key.upper(), None)
+        self.name_matcher.remove(character.key.upper())
+        self.name_indexes[0].remove(character.key, character)
+        self.name_indexes[None].add(character.key, character)
         entities = {'enactor': enactor, 'character': character, 'account': account}
         cmsg.ArchiveMessage(entities).send()
         character.force_disconnect(reason="Character has been archived!")
@@ -106,9 +249,17 @@ class AthanorCharacterController(*MIXINS, AthanorController):
     def restore_character(self, session, character, replace_name):
         if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Admin)"):
             raise ValueError("Permission denied.")
-        character = self.find_character(character)
+        character = self.find_character(character, archived=True)
         account = character.character_bridge.account
+        old_name = character.key
+        self.check_name(replace_name if replace_name else old_name, namespace=0, character=character)
         character.restore(replace_name)
+        self.update_iname(character)
+        self.name_indexes[None].remove(old_name, character)
+        self.name_indexes[0].add(character.key, character)
+        self.id_map[character.id] = character
+        self.name_map[character.key.upper()] = character
+        self.name_matcher.add(character.key.upper())
         entities = {'enactor': enactor, 'character': character, 'account': account}
         cmsg.RestoreMessage(entities).send()
 
@@ -119,7 +270,16 @@ class AthanorCharacterController(*MIXINS, AthanorController):
         character = self.find_character(character)
         account = character.character_bridge.account
         old_name = character.key
+        old_iname = (character.character_bridge.db_namespace, character.character_bridge.db_iname)
+        self.check_name(new_name, namespace=old_iname[0], character=character)
         new_name = character.rename(new_name)
+        self.update_iname(character, old=old_iname)
+        self.name_indexes[character.character_bridge.db_namespace].move(old_name, character.key, character)
+        if self.name_map.get(old_name.upper(), None) == character:
+            del self.name_map[old_name.upper()]
+            self.name_matcher.remove(old_name.upper())
+            self.name_map[character.key.upper()] = character
+            self.name_matcher.add(character.key.upper())
         entities = {'enactor': enactor, 'character': character, 'account': account}
         cmsg.RenameMessage(entities, old_name=old_name).send()
 
@@ -141,16 +301,35 @@ class AthanorCharacterController(*MIXINS, AthanorController):
         character = self.find_character(character)
         return character.render_examine(enactor)
 
-    def list_characters(self, session, archived=False):
+    def list_characters(self, session, archived=False, account=None, online=None, order='id', page_size=None):
+        """
+        Lists Characters a page at a time. Filtering and ordering happen in the database.
+
+        Args:
+            session (ServerSession): The Session asking.
+            archived (bool): List archived Characters instead of active ones.
+            account (AccountDB or str or None): Only list Characters belonging to this Account.
+            online (bool or None): If set, only list Characters that are (or are not) puppeted.
+            order (str): One of list_orders. Prefix with - to reverse it.
+            page_size (int or None): Characters per page. Defaults to settings.LIST_PAGE_SIZE.
+
+        Returns:
+            pages (generator of str): Rendered pages, meant to be sent as they're produced.
+        """
         if not (enactor := session.get_account()) or not enactor.check_lock("pperm(Admin)"):
             raise ValueError("Permission denied.")
-        if not (characters := self.all() if not archived else self.archived()):
+        if not (field := self.list_orders.get(order.lstrip('-').lower(), None)):
+            raise ValueError(f"Characters can be ordered by: {', '.join(self.list_orders.keys())}")
+        characters = self.archived() if archived else self.all().filter(character_bridge__db_namespace=0)
+        if account:
+            account = self.manager.get('account').find_account(account)
+            characters = characters.filter(character_bridge__db_account=account)
+        if online is not None:
+            characters = characters.filter(db_account__isnull=not online)
+        if not characters.exists():
             raise ValueError("No characters to list!")
+        characters = characters.select_related('character_bridge__db_account')
         styling = enactor.styler
-        message = [
-            styling.styled_header(f"{'Character' if not archived else 'Archived Character'} Listing")
-        ]
-        for char in characters:
-            message.extend(char.render_list_section(enactor, styling))
-        message.append(styling.blank_footer)
-        return '\n'.join(str(l) for l in message)
\ No newline at end of file
+        pages = iter_pages(characters, page_size or settings.LIST_PAGE_SIZE, f"{'-' if order.startswith('-') else ''}{field}")
+        return render_pages(pages, styling.styled_header(f"{'Character' if not archived else 'Archived Character'} Listing"),
+                            styling.blank_footer, lambda char: char.render_list_section(enactor, styling))
\ No newline at end of file
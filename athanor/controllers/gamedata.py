@@ -1,12 +1,22 @@
+import os
+import pickle
+import time
 from django.conf import settings
+from django.db import transaction
 from collections import defaultdict
+from functools import partial
+from types import MappingProxyType
 
-from evennia.utils.logger import log_trace
+from evennia.utils.logger import log_trace, log_info
 from evennia.utils.utils import class_from_module, make_iter
 
 from athanor.gamedb.objects import AthanorObject
 from athanor.controllers.base import AthanorController
-from athanor.datamodule import AthanorDataModule
+from athanor.datamodule import AthanorDataModule, RELEASED
+from athanor.utils.templates import TemplateResolver, Template, split_path, intern_keys, overlay, flatten
+from athanor.utils.dataloader import fingerprint, iter_entries
+from athanor.utils.watcher import DataWatcher
+from athanor.utils.gamestore import GameDataStore
 
 MIXINS = [class_from_module(mixin) for mixin in settings.CONTROLLER_MIXINS["GAMEDATA"]]
 MIXINS.sort(key=lambda x: getattr(x, "mixin_priority", 0))
@@ -14,50 +24,193 @@ MIXINS.sort(key=lambda x: getattr(x, "mixin_priority", 0))
 
 class AthanorGameDataController(*MIXINS, AthanorController):
     system_name = 'GAMEDATA'
+    # gather() only reads files.
+    threaded_gather = True
+    cache_version = 4
 
     def __init__(self, key, manager):
         AthanorController.__init__(self, key, manager)
         self.plugins = dict()
         self.plugins_sorted = list()
         self.plugin_class = None
+        self.class_cache = defaultdict(dict)
+        # (digests, resolved): the fingerprint of every raw template, and the resolved templates.
+        self.template_cache = (dict(), dict())
+        # Templates whose resolved data changed during the last prepare_templates. None if unknown.
+        self.templates_changed = None
+        # (plugin key, map key) -> (fingerprint, template references, prepared map data)
+        self.map_cache = dict()
+        # (plugin key, kind, template names) -> the tuple of templates shared by every record
+        # built on them. Emptied whenever maps are prepared, as the templates may have changed.
+        self.record_parents = dict()
+        self.regions = dict()
+        # region key -> the data the region was last loaded or updated with.
+        self.region_data = dict()
+        # region key -> fingerprint of the data last written to the Region's database entry.
+        self.region_digests = dict()
+        self.watcher = None
+        # A GameDataStore, if settings.GAMEDATA_STORE_PATH is set. Templates and maps are kept
+        # there instead of in the plugins' templates and maps.
+        self.store = None
+        # Whether the DataModules' file_cache has released its parsed data. See release_files().
+        self.files_released = False
 
-    def do_load(self):
+    def gather(self, snapshot=None):
+        """
+        Reading every plugin's data files is the slow part of loading, and touches nothing but disk.
+        """
         try:
-            self.plugin_class = class_from_module(settings.GAMEDATA_MODULE_CLASS)
+            plugin_class = class_from_module(settings.GAMEDATA_MODULE_CLASS)
         except Exception:
             log_trace()
-            self.plugin_class = AthanorDataModule
+            plugin_class = AthanorDataModule
+        cache = self.read_cache()
+        return plugin_class, self.read_plugins(plugin_class, cache), cache
 
-        self.load_plugins()
+    def do_load(self, gathered=None):
+        self.plugin_class, plugins, cache = gathered if gathered else self.gather()
+        self.load_plugins(plugins)
+        if settings.GAMEDATA_STORE_PATH:
+            self.store = GameDataStore(settings.GAMEDATA_STORE_PATH, cache_size=settings.GAMEDATA_STORE_CACHE_SIZE,
+                                       batch_size=settings.GAMEDATA_STORE_BATCH_SIZE)
+        if cache and cache.get('store', None) != self.store_token():
+            # Templates and maps were cached with or for a different store. Only files can be trusted.
+            cache = dict(cache, templates=(dict(), dict()), maps=dict())
+        self.prepare_templates(cache)
+        self.prepare_maps(cache)
+        if self.store:
+            self.store.commit()
+        if settings.GAMEDATA_SYNC_REGIONS:
+            self.load_regions(cache)
+        if self.write_cache():
+            self.release_files()
 
-    def load_plugins(self):
+    def store_token(self):
+        return self.store.token if self.store else None
+
+    def read_cache(self):
+        """
+        Reads what the last load compiled from settings.GAMEDATA_CACHE_PATH. Any problem with the
+        file just means starting from scratch.
+
+        Returns:
+            cache (dict or None)
+        """
+        if not (cache_path := settings.GAMEDATA_CACHE_PATH) or not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                cache = pickle.load(cache_file)
+            if cache.get('version', None) != self.cache_version:
+                return None
+            return cache
+        except Exception:
+            log_trace(f"Could not read gamedata cache {cache_path}. Ignoring it.")
+            return None
+
+    def write_cache(self):
+        """
+        Saves parsed files, resolved templates, and prepared maps to settings.GAMEDATA_CACHE_PATH,
+        for the next load to reuse whatever hasn't changed.
+
+        Returns:
+            written (bool)
+        """
+        if not (cache_path := settings.GAMEDATA_CACHE_PATH):
+            return False
+        cache = self.compiled_cache()
+        temp_path = f"{cache_path}.tmp"
+        try:
+            with open(temp_path, 'wb') as cache_file:
+                pickle.dump(cache, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except Exception:
+            log_trace(f"Could not write gamedata cache {cache_path}.")
+            return False
+        return True
+
+    def release_files(self):
+        """
+        With a store, drops the parsed files kept for reuse once they've been written to the
+        cache file, so that memory follows what's in use rather than every file's contents.
+        Only their modification times, sizes, and digests are kept, for watch() and for
+        noticing changes. reload_data reads the rest back from the cache file.
+
+        Returns:
+            None
+        """
+        if not self.store:
+            return
+        for plugin in self.plugins_sorted:
+            plugin.file_cache = {file_path: entry if entry[3] is None else (*entry[:3], RELEASED)
+                                 for file_path, entry in plugin.file_cache.items()}
+        self.files_released = True
+
+    def compiled_cache(self):
+        """
+        Returns:
+            cache (dict): What's been compiled so far, in the form read_cache returns.
+        """
+        return {
+            'version': self.cache_version,
+            'files': {plugin.key: plugin.file_cache for plugin in self.plugins_sorted},
+            'templates': self.template_cache,
+            'maps': self.map_cache,
+            'regions': self.region_digests,
+            'store': self.store_token()
+        }
+
+    def read_plugins(self, plugin_class, cache=None):
+        """
+        Args:
+            plugin_class (class): The default DataModule class.
+            cache (dict or None): From read_cache. Files it lists unchanged aren't parsed again.
+
+        Returns:
+            plugins (list): Initialized DataModules, in load order.
+        """
+        plugins = list()
+        files = cache['files'] if cache else dict()
         for plugin_module in settings.ATHANOR_PLUGINS_LOADED:
-            use_class = self.plugin_class
+            use_class = plugin_class
             if hasattr(plugin_module, "PLUGIN_CLASS"):
                 use_class = class_from_module(plugin_module.PLUGIN_CLASS)
             loaded_plugin = use_class(plugin_module)
+            loaded_plugin.file_cache = files.get(loaded_plugin.key, dict())
             loaded_plugin.initialize()
+            plugins.append(loaded_plugin)
+        return plugins
+
+    def load_plugins(self, plugins=None):
+        if plugins is None:
+            plugins = self.read_plugins(self.plugin_class)
+        for loaded_plugin in plugins:
             self.plugins[loaded_plugin.key] = loaded_plugin
             self.plugins_sorted.append(loaded_plugin)
 
     def resolve_path(self, path, plugin, kind):
-        split_path = path.split('/')
-        if len(split_path) == 1:
-            plugin_path = plugin
-            kind_path = kind
-            key_path = split_path[0]
-        if len(split_path) == 2:
-            plugin_path = plugin
-            kind_path, key_path = split_path
-        if len(split_path) == 3:
-            plugin_path, kind_path, key_path = split_path
-        return plugin_path, kind_path, key_path
+        return split_path(path, plugin, kind)
+
+    def class_path(self, kind, path):
+        """
+        Picks the class that a template or record's entity will be created as, without importing
+        it. Prepared gamedata only holds these paths. get_class imports them once something is
+        actually created, so that a missing class can't stop the server from loading.
+
+        Args:
+            kind (str): The kind of entity, such as 'rooms'.
+            path (str or None): The class named by the data itself.
+
+        Returns:
+            path (str or None)
+        """
+        return path or settings.DEFAULT_ENTITY_CLASSES.get(kind, None)
 
     def get_class(self, kind, path):
         if path and not isinstance(path, str):
             return path
-        if not path:
-            return class_from_module(settings.DEFAULT_ENTITY_CLASSES[kind])
+        if not (path := self.class_path(kind, path)):
+            raise ValueError(f"No class given for {kind}, and no default in settings.DEFAULT_ENTITY_CLASSES.")
         if not (found := self.class_cache[kind].get(path, None)):
             found = class_from_module(path)
             self.class_cache[kind][path] = found
@@ -85,7 +238,14 @@ class AthanorGameDataController(*MIXINS, AthanorController):
             raise ValueError(f"Cannot find that room_key in {found}!")
         return room
 
-    def prepare_templates(self):
+    def prepare_templates(self, cache=None):
+        """
+        Resolves every plugin's templates. Given a cache, only templates that changed since, and
+        those inheriting from them, are resolved again.
+
+        Args:
+            cache (dict or None): From read_cache.
+        """
         templates_raw = dict()
 
         for plugin in self.plugins.values():
@@ -93,35 +253,62 @@ class AthanorGameDataController(*MIXINS, AthanorController):
                 for template_key, template_data in templates.items():
                     templates_raw[(plugin.key, template_type, template_key)] = template_data
 
-        templates_left = set(templates_raw.keys())
-        loaded_set = set()
-        current_count = 0
-        while len(templates_left) > 0:
-            start_count = current_count
-            for template in templates_left:
-                template_data = templates_raw[template]
-                template_list = make_iter(template_data.get('templates', list()))
-                resolved = [self.resolve_path(template_par, template[0], template[1]) for template_par in template_list]
-                if len(set(resolved) - loaded_set) > 0:
-                    continue
-                final_data = dict()
-                for template_par in resolved:
-                    final_data.update(templates_raw[template_par])
-                final_data.update(templates_raw[template])
-                if "templates" in final_data:
-                    del final_data['templates']
-                final_data['class'] = self.get_class(template[1], final_data.get('class', None))
-                self.plugins[template[0]].templates[template[1]][template[2]] = final_data
-                loaded_set.add(template)
-                current_count += 1
-            templates_left -= loaded_set
-            if start_count == current_count:
-                raise ValueError(
-                    f"Unresolveable old_templates detected! Error for template {template} ! Potential endless loop broken! old_templates left: {templates_left}")
+        start = time.perf_counter()
+        digests = {node: fingerprint(data) for node, data in templates_raw.items()}
+        resolver = TemplateResolver(templates_raw, finalize=self.finalize_template)
+        if cache:
+            old_digests, old_resolved = cache['templates']
+            changed = {node for node, digest in digests.items() if old_digests.get(node, None) != digest}
+            affected = resolver.descendants(changed)
+            if self.store:
+                needed = {parent for node in affected for parent in resolver.graph[node]} - affected
+                kept = {node: self.store.template(*node) for node in needed}
+            else:
+                kept = {node: data for node, data in old_resolved.items() if node in digests and node not in affected}
+            resolved = resolver.resolve(nodes=affected, resolved=kept)
+            self.templates_changed = affected | (old_digests.keys() - digests.keys())
+        else:
+            resolved = resolver.resolve()
+            self.templates_changed = None
+        if self.store:
+            if self.templates_changed is None or not cache['templates'][0]:
+                self.store.write_templates(resolved, replace=True)
+            else:
+                self.store.write_templates({node: resolved[node] for node in affected})
+                self.store.delete_templates(self.templates_changed - digests.keys())
+            resolved = dict()
+        for (plugin_key, kind, key), final_data in resolved.items():
+            self.plugins[plugin_key].templates[kind][key] = final_data
+        self.template_cache = (digests, resolved)
+        redone = len(templates_raw) if self.templates_changed is None else len(affected)
+        log_info(f"{self.__class__.__name__}: Resolved {redone} of {len(templates_raw)} templates in "
+                 f"{time.perf_counter() - start:.3f} seconds.")
+
+    def finalize_template(self, template, final_data):
+        """
+        Called by the TemplateResolver once per template, after its parents are merged in.
+        The result is shared by everything built from the template, so it mustn't be modified.
+        """
+        final_data['class'] = self.class_path(template[1], final_data.get('class', None))
+        return Template(template, intern_keys(final_data))
 
     def get_template(self, plugin_key, kind, key):
+        """
+        Returns:
+            template (MappingProxyType): A read-only view of the resolved template.
+        """
+        return MappingProxyType(self.template_data(plugin_key, kind, key))
+
+    def template_data(self, plugin_key, kind, key):
+        """
+        Like get_template, but returns the shared dict itself. It must not be modified.
+        """
         if not (plugin := self.plugins.get(plugin_key, None)):
             raise ValueError(f"No such Plugin: {plugin_key}")
+        if self.store:
+            if (found := self.store.template(plugin_key, kind, key)) is None:
+                raise ValueError(f"No Template: {plugin_key}/{kind}/{key}")
+            return found
         if not (ki := plugin.templates.get(kind, None)):
             raise ValueError(f"No Template Kind: {plugin_key}/{kind}")
         if not (k := ki.get(key, None)):
@@ -129,41 +316,343 @@ class AthanorGameDataController(*MIXINS, AthanorController):
         return k
 
     def prepare_data(self, kind, start_data, plugin, no_class=False):
-        data = dict()
+        """
+        Builds a record from its own data and the templates it lists.
+
+        Returns:
+            data (Record): start_data overlaying the templates. See athanor.utils.templates.Record.
+        """
+        parents = tuple()
         if (templates := start_data.get('templates', None)):
-            for template in make_iter(templates):
-                data.update(self.get_template(plugin, kind, template))
-            start_data.pop('templates')
-        data.update(start_data)
+            names = (plugin, kind, tuple(make_iter(templates)))
+            if (parents := self.record_parents.get(names, None)) is None:
+                parents = tuple(self.template_data(plugin, kind, template) for template in names[2])
+                self.record_parents[names] = parents
+        # Only the Record's own copy is changed, as YAML aliases can share start_data between records.
+        data = overlay(start_data, parents)
+        data.data.pop('templates', None)
         if not no_class:
-            data['class'] = self.get_class(kind, start_data.pop('class', None))
+            data['class'] = self.class_path(kind, data.data.pop('class', None))
         return data
 
-    def prepare_maps(self):
+    def map_entries(self, data):
+        """
+        Args:
+            data (dict): Raw map data.
+
+        Yields:
+            section (str), key (str or None), entry: The map's entries, as
+                athanor.utils.dataloader.iter_entries reads them from a streamed map file.
+        """
+        for section, value in data.items():
+            if section == 'map' or not isinstance(value, dict):
+                yield section, None, value
+                continue
+            for key, entry in value.items():
+                yield section, key, entry
+
+    def entry_templates(self, plugin_key, section, entry):
+        """
+        Lists the templates one map entry uses, as prepare_data will look them up.
+
+        Returns:
+            templates (set): (plugin, kind, key) nodes.
+        """
+        if section == 'exits':
+            entries = [('exits', exit_data) for exit_data in (entry or dict()).values()]
+        elif section in ('map', 'areas', 'rooms', 'gateways'):
+            entries = [('maps' if section == 'map' else section, entry)]
+        else:
+            return set()
+        return {(plugin_key, kind, template) for kind, data in entries
+                if data and (templates := data.get('templates', None)) for template in make_iter(templates)}
+
+    def prepare_records(self, plugin_key, entries, templates):
+        """
+        Prepares a map's entries one at a time, so that they can come straight from a map file
+        that's being streamed and go straight into the store.
+
+        Args:
+            plugin_key (str): The plugin the map belongs to.
+            entries (iterable): (section, key, entry) from map_entries or iter_entries.
+            templates (set): The templates the entries use are added to this.
+
+        Yields:
+            section (str), key (str or None), record: Exits are yielded as a room key and a dict
+                of that room's exits, since a room's exits may be read before the room itself.
+                The 'map' section is yielded last, as several documents may each add to it.
+        """
+        map_raw = dict()
+        for section, key, entry in entries:
+            templates.update(self.entry_templates(plugin_key, section, entry))
+            if section == 'map':
+                map_raw.update(entry or dict())
+            elif key is None:
+                continue
+            elif section in ('areas', 'rooms', 'gateways'):
+                yield section, key, self.prepare_data(section, entry, plugin_key)
+            elif section == 'exits':
+                yield section, key, {dest_key: self.prepare_data('exits', exit_data, plugin_key)
+                                     for dest_key, exit_data in (entry or dict()).items()}
+        yield 'map', None, self.prepare_data('maps', map_raw, plugin_key, no_class=True)
+
+    def prepare_map(self, plugin_key, entries):
+        """
+        Builds a whole map in memory. Used when there's no store, even for streamed map files,
+        so streaming alone doesn't bound peak memory. With a store, prepare_maps writes the
+        records as they come instead.
+
+        Args:
+            plugin_key (str): The plugin the map belongs to.
+            entries (iterable): (section, key, entry) from map_entries or iter_entries.
+
+        Returns:
+            map_data (defaultdict), templates (set): The prepared map, and the templates it uses.
+        """
+        map_data = defaultdict(dict)
+        templates = set()
+        exits = dict()
+        for section, key, record in self.prepare_records(plugin_key, entries, templates):
+            if section == 'map':
+                map_data['map'] = record
+            elif section == 'exits':
+                exits[key] = record
+            else:
+                map_data[section][key] = record
+        for room_key, room_exits in exits.items():
+            map_data['rooms'][room_key]['exits'] = room_exits
+        return map_data, templates
+
+    def prepare_maps(self, cache=None):
+        """
+        Prepares every plugin's maps. Given a cache, a map is reused if neither it nor any
+        template it uses has changed since. Map files too big to parse whole are streamed.
+
+        With a store, maps are written to it rather than kept in the plugins' maps.
+
+        Args:
+            cache (dict or None): From read_cache.
+        """
+        old_maps = cache['maps'] if cache and self.templates_changed is not None else dict()
+        map_cache = dict()
+        self.record_parents = dict()
         for plugin_key, plugin in self.plugins.items():
-            for key, data in plugin.data.pop("maps", dict()).items():
-                map_data = defaultdict(dict)
-                map_data['map'] = self.prepare_data('maps', data.get('map', dict()), plugin_key, no_class=True)
-                for kind in ('areas', 'rooms', 'gateways'):
-                    for thing_key, thing_data in data.get(kind, dict()).items():
-                        map_data[kind][thing_key] = self.prepare_data(kind, thing_data, plugin_key)
-
-                for room_key, room_exits in data.get('exits', dict()).items():
-                    map_data['rooms'][room_key]['exits'] = dict()
-                    if not room_exits:
-                        continue
-                    for dest_key, exit_data in room_exits.items():
-                        map_data['rooms'][room_key]['exits'][dest_key] = self.prepare_data('exits', exit_data,
-                                                                                           plugin_key)
-
-                plugin.maps[key] = map_data
-
-    def load_regions(self):
+            sources = [(key, fingerprint(data), partial(self.map_entries, data))
+                       for key, data in plugin.data.pop("maps", dict()).items()]
+            # Streamed maps are identified by their file's digest, and only read if they must be rebuilt.
+            sources.extend((key, digest, partial(iter_entries, file_path, whole=('map',)))
+                           for key, (file_path, digest) in plugin.streams.items())
+            for key, digest, entries in sources:
+                if (old := old_maps.get((plugin_key, key), None)) and old[0] == digest \
+                        and old[1].isdisjoint(self.templates_changed) \
+                        and (not self.store or self.store.map_digest(plugin_key, key) == digest):
+                    if not self.store:
+                        plugin.maps[key] = old[2]
+                    map_cache[(plugin_key, key)] = old
+                    continue
+                if self.store:
+                    # Records are written in batches as they're prepared, never all held at once.
+                    templates = set()
+                    self.store.write_map(plugin_key, key, digest, self.prepare_records(plugin_key, entries(), templates))
+                    map_data = None
+                else:
+                    map_data, templates = self.prepare_map(plugin_key, entries())
+                    plugin.maps[key] = map_data
+                map_cache[(plugin_key, key)] = (digest, templates, map_data)
+        if self.store:
+            self.store.delete_maps(self.store.map_keys() - map_cache.keys())
+        self.map_cache = map_cache
+        self.record_parents = dict()
+
+    def get_map(self, plugin_key, key):
+        """
+        Returns:
+            map_data (dict or None): A prepared map. From the store, it's read anew on every call.
+                Its entries are Records, which must be flattened before they're serialized or
+                stored in Attributes. See athanor.utils.templates.flatten.
+        """
+        if not (plugin := self.plugins.get(plugin_key, None)):
+            raise ValueError(f"No such Plugin: {plugin_key}")
+        if self.store:
+            return self.store.read_map(plugin_key, key)
+        return plugin.maps.get(key, None)
+
+    def get_map_entry(self, plugin_key, map_key, section, key=None):
+        """
+        Args:
+            plugin_key (str): The plugin.
+            map_key (str): The map.
+            section (str): 'map', 'rooms', 'areas', or 'gateways'.
+            key (str or None): The entry's key. Not used for 'map'.
+
+        Returns:
+            entry (dict or None): A prepared record, such as a room, flattened into a plain dict
+                of its own.
+        """
+        if self.store:
+            return flatten(self.store.entry(plugin_key, map_key, section, key))
+        if not (map_data := self.get_map(plugin_key, map_key)):
+            return None
+        if section == 'map':
+            return flatten(map_data['map'])
+        return flatten(map_data.get(section, dict()).get(key, None))
+
+    def load_regions(self, cache=None):
+        """
+        Brings the database's Regions in line with plugin data. Every existing Region is fetched
+        in one query, then the Regions to create, update, and delete are worked out and applied
+        in one transaction. Regions whose data hasn't changed since the cache was written are
+        left alone. Creating and updating go through the Region typeclass's create_region and
+        update_data, one Region at a time, so that its hooks run.
+
+        Only called if settings.GAMEDATA_SYNC_REGIONS is enabled. If the Region class can't be
+        imported, nothing is done.
+
+        Regions no longer in any plugin's data are only deleted if settings.GAMEDATA_DELETE_REGIONS
+        is enabled. Otherwise they're just reported.
+
+        Args:
+            cache (dict or None): From read_cache.
+
+        Returns:
+            None
+        """
+        regions_data = dict()
         for plugin_key, plugin in self.plugins.items():
             for key, data in plugin.data.pop('regions', dict()).items():
-                if not (found := AthanorRegion.objects.filter_family(region_bridge__system_key=key).first()):
-                    region_class = self.get_class("regions", data.pop('class', None))
-                    found = region_class.create_region(plugin_key, key, data)
-                else:
-                    found.update_data(data)
-                self.regions[key] = found
+                regions_data[key] = (plugin_key, data)
+        if not regions_data:
+            return
+        start = time.perf_counter()
+        digests = {key: fingerprint(data) for key, (plugin_key, data) in regions_data.items()}
+        old_digests = cache.get('regions', dict()) if cache else dict()
+        try:
+            region_class = self.get_class('regions', None)
+        except Exception:
+            log_trace("Could not import the Region class. Regions were not synchronized.")
+            return
+        existing = {region.region_bridge.system_key: region for region in
+                    region_class.objects.filter_family(region_bridge__isnull=False).select_related('region_bridge')}
+
+        create = [key for key in regions_data if key not in existing]
+        update = [key for key in regions_data if key in existing and old_digests.get(key, None) != digests[key]]
+        orphaned = [key for key in existing if key not in regions_data]
+
+        with transaction.atomic():
+            if settings.GAMEDATA_DELETE_REGIONS:
+                for key in orphaned:
+                    existing.pop(key).delete()
+            for key in create:
+                plugin_key, data = regions_data[key]
+                data = dict(data)
+                use_class = self.get_class('regions', data.pop('class', None))
+                existing[key] = use_class.create_region(plugin_key, key, data)
+            for key in update:
+                existing[key].update_data(regions_data[key][1])
+
+        if orphaned and not settings.GAMEDATA_DELETE_REGIONS:
+            log_info(f"{self.__class__.__name__}: Regions no longer in plugin data were kept: {', '.join(orphaned)}")
+        self.regions = {key: existing[key] for key in regions_data}
+        self.region_data = {key: dict(data) for key, (plugin_key, data) in regions_data.items()}
+        self.region_digests = digests
+        log_info(f"{self.__class__.__name__}: Synchronized {len(regions_data)} regions in "
+                 f"{time.perf_counter() - start:.3f} seconds. Created {len(create)}, updated {len(update)}, "
+                 f"{'deleted' if settings.GAMEDATA_DELETE_REGIONS else 'kept'} {len(orphaned)}.")
+
+    def update_regions(self):
+        """
+        Sends loaded Regions whatever changed in their data, via update_data. Fields that were
+        removed are sent as None. Regions that aren't loaded are left for load_regions.
+
+        Returns:
+            updated (list): Keys of the Regions that were updated.
+        """
+        updated = list()
+        for plugin in self.plugins_sorted:
+            for key, data in plugin.data.pop('regions', dict()).items():
+                if not (region := self.regions.get(key, None)):
+                    continue
+                old = self.region_data.get(key, dict())
+                diff = {field: value for field, value in data.items() if field not in old or old[field] != value}
+                diff.update({field: None for field in old.keys() - data.keys()})
+                self.region_data[key] = dict(data)
+                self.region_digests[key] = fingerprint(data)
+                if diff:
+                    region.update_data(diff)
+                    updated.append(key)
+        return updated
+
+    def reload_data(self, changed=None):
+        """
+        Reloads plugin data after files changed on disk, without a restart. Only the changed
+        files are parsed, and only templates and maps that depend on them are rebuilt. If
+        anything fails, such as a file that doesn't parse, the data in use is kept.
+
+        Args:
+            changed (iterable or None): The changed file paths, for logging.
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        cache = self.compiled_cache()
+        if self.files_released and (written := self.read_cache()) and written.get('store', None) == cache['store']:
+            # The parsed files were released from memory. Without the cache file, they're parsed again.
+            cache['files'] = written['files']
+        previous = (self.plugins, self.plugins_sorted, self.template_cache, self.templates_changed, self.map_cache)
+        try:
+            plugins = self.read_plugins(self.plugin_class, cache)
+            self.plugins = dict()
+            self.plugins_sorted = list()
+            self.load_plugins(plugins)
+            self.prepare_templates(cache)
+            self.prepare_maps(cache)
+        except Exception:
+            (self.plugins, self.plugins_sorted, self.template_cache, self.templates_changed,
+             self.map_cache) = previous
+            if self.store:
+                self.store.rollback()
+            log_trace("Could not reload gamedata. Keeping the data already loaded.")
+            return
+        if self.store:
+            self.store.commit()
+        old_maps = previous[4]
+        maps = {key for key, entry in self.map_cache.items() if old_maps.get(key, None) is not entry}
+        maps.update(old_maps.keys() - self.map_cache.keys())
+        regions = self.update_regions()
+        self.files_released = False
+        if self.write_cache():
+            self.release_files()
+        log_info(f"{self.__class__.__name__}: Reloaded {len(changed or ())} changed files in "
+                 f"{time.perf_counter() - start:.3f} seconds. Changed {len(self.templates_changed)} templates, "
+                 f"{len(maps)} maps, {len(regions)} regions.")
+        self.fire_global('gamedata_reloaded', templates=self.templates_changed, maps=maps, regions=regions)
+
+    def watch(self, interval):
+        """
+        Starts polling every plugin's data directory for changes, calling reload_data when
+        any are found.
+
+        Args:
+            interval (float): Seconds between polls.
+
+        Returns:
+            None
+        """
+        self.unwatch()
+        known = dict()
+        for plugin in self.plugins_sorted:
+            known.update({file_path: entry[:2] for file_path, entry in plugin.file_cache.items()})
+        self.watcher = DataWatcher([plugin.data_path for plugin in self.plugins_sorted], self.reload_data,
+                                   interval=interval, known=known)
+        self.watcher.start()
+
+    def unwatch(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+
+    def close_store(self):
+        if self.store:
+            self.store.close()
+            self.store = None
@@ -1,9 +1,18 @@
+import os
+import pickle
+import time
+from collections import defaultdict
 from os import path
-from os import scandir
-import yaml, json
 
 from django.conf import settings
 from evennia.utils.utils import class_from_module
+from evennia.utils.logger import log_info
+
+from athanor.utils.dataloader import find_files, parse_files, file_digest
+
+# Stands in for the pickled data of a file_cache entry whose data was released from memory.
+# Such an entry only shows whether the file changed.
+RELEASED = b''
 
 MIXINS = [class_from_module(mixin) for mixin in settings.MIXINS["GAMEDATA_MODULE"]]
 MIXINS.sort(key=lambda x: getattr(x, "mixin_priority", 0))
@@ -27,6 +36,16 @@ class AthanorDataModule(*MIXINS):
         self.key = getattr(self.module, "KEY", path.split(self.path)[1])
         self.data_path = path.join(self.path, 'data')
         self.data = dict()
+        self.templates = defaultdict(dict)
+        self.maps = dict()
+        self.parse_times = dict()
+        # file path -> (mtime_ns, size, content digest, pickled data). Seeded from the gamedata
+        # cache before initialize() so that unchanged files needn't be parsed again. The data is
+        # None for streamed files, and RELEASED once the GameData Controller has dropped it.
+        self.file_cache = dict()
+        # map key -> (file path, content digest) of map files too big to parse whole. They're
+        # streamed by the GameData Controller's prepare_maps instead.
+        self.streams = dict()
 
     def initialize(self):
         """
@@ -45,7 +64,13 @@ class AthanorDataModule(*MIXINS):
     def load_data(self, data_path):
         """
         This recursively scans the "data" directory for directories and YAML/JSON files,
-        creating a dictionary from the results.
+        creating a dictionary from the results. Files are parsed in a process pool if there
+        are at least settings.GAMEDATA_PARSE_THRESHOLD of them, and always merged in the
+        same (sorted) order.
+
+        Files whose modification time and size, or failing that contents, match file_cache
+        are taken from it instead of being parsed. Map files of at least
+        settings.GAMEDATA_STREAM_THRESHOLD bytes aren't parsed here at all, but listed in streams.
 
         Args:
             data_path (Path): The directory to begin scanning.
@@ -55,21 +80,92 @@ class AthanorDataModule(*MIXINS):
         """
         if not path.exists(data_path):
             return
+        start = time.perf_counter()
+        files = find_files(data_path)
+        file_cache = dict()
+        to_parse = list()
+        merged = set()
+        self.streams = dict()
+        for keys, file_path in files:
+            stat = os.stat(file_path)
+            streamed = self.should_stream(keys, file_path, stat.st_size)
+            entry = self.file_cache.get(file_path, None)
+            if entry and ((entry[3] is None) != streamed or entry[3] == RELEASED):
+                # The file crossed the streaming threshold, so its cache entry is of the wrong
+                # kind, or its data was released.
+                entry = None
+            if not entry or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                digest = file_digest(file_path)
+                if entry and entry[2] == digest:
+                    entry = (stat.st_mtime_ns, stat.st_size, digest, entry[3])
+                elif streamed:
+                    entry = (stat.st_mtime_ns, stat.st_size, digest, None)
+                else:
+                    to_parse.append((file_path, stat, digest))
+                    if self.is_map(keys):
+                        merged.add(file_path)
+                    continue
+            file_cache[file_path] = entry
+            if streamed:
+                self.streams[keys[1]] = (file_path, entry[2])
+        results = parse_files([file_path for file_path, stat, digest in to_parse],
+                              processes=settings.GAMEDATA_PARSE_PROCESSES, threshold=settings.GAMEDATA_PARSE_THRESHOLD,
+                              merge=merged)
+        parsed = dict()
+        self.parse_times = dict()
+        for (file_path, stat, digest), (data, elapsed) in zip(to_parse, results):
+            self.parse_times[file_path] = elapsed
+            parsed[file_path] = data
+            # Stored pickled, because later processing modifies the data it's given.
+            file_cache[file_path] = (stat.st_mtime_ns, stat.st_size, digest,
+                                     pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        self.file_cache = file_cache
         final_data = dict()
-        for node in scandir(data_path):
-            if node.is_dir():
-                final_data[node.name.lower()] = self.load_data(node)
-            elif node.is_file():
-                node_name = node.name.lower()
-                data = dict()
-                with open(node, "r") as data_file:
-                    if node_name.endswith(".yaml"):
-                        for entry in yaml.safe_load_all(data_file):
-                            data.update(entry)
-                    elif node_name.endswith(".json"):
-                        data = json.load(data_file)
-                final_data[node_name.split('.', 1)[0]] = data
+        for keys, file_path in files:
+            if (data := parsed.get(file_path, None)) is None:
+                if (blob := file_cache[file_path][3]) is None:
+                    continue
+                data = pickle.loads(blob)
+            branch = final_data
+            for key in keys[:-1]:
+                if not isinstance(branch.get(key, None), dict):
+                    branch[key] = dict()
+                branch = branch[key]
+            branch[keys[-1]] = data
+        if to_parse:
+            slowest = sorted(self.parse_times.items(), key=lambda x: x[1], reverse=True)[:5]
+            log_info(f"{self!r}: Parsed {len(to_parse)} of {len(files)} data files in "
+                     f"{time.perf_counter() - start:.3f} seconds. "
+                     f"Slowest: {', '.join(f'{path.relpath(p, data_path)} ({t:.3f}s)' for p, t in slowest)}")
         return final_data
 
+    def should_stream(self, keys, file_path, size):
+        """
+        Decides whether a data file is streamed rather than parsed whole. Only YAML map files
+        can be.
+
+        Args:
+            keys (tuple): Where the file's data belongs, as from find_files.
+            file_path (str): The file.
+            size (int): Its size in bytes.
+
+        Returns:
+            streamed (bool)
+        """
+        threshold = settings.GAMEDATA_STREAM_THRESHOLD
+        return bool(threshold) and size >= threshold and self.is_map(keys) and file_path.lower().endswith('.yaml')
+
+    @staticmethod
+    def is_map(keys):
+        """
+        Args:
+            keys (tuple): Where a file's data belongs, as from find_files.
+
+        Returns:
+            is_map (bool): Whether the file is a map. The documents of a map file are merged
+                section by section, as when it's streamed.
+        """
+        return len(keys) == 2 and keys[0] == 'maps'
+
     def __repr__(self):
         return f"<{self.__class__.__name__}: {self.key}>"
\ No newline at end of file
@@ -1,5 +1,6 @@
 import datetime
 from django.conf import settings
+from django.db import transaction, IntegrityError
 
 from evennia.utils.utils import class_from_module, lazy_property
 from evennia.accounts.accounts import DefaultAccount
@@ -8,6 +9,7 @@ from evennia.commands.cmdhandler import get_and_merge_cmdsets
 from evennia import SESSION_HANDLER
 
 import athanor
+from athanor.models import AccountEmail
 
 from athanor.utils.events import EventEmitter
 from athanor.gamedb.characters import AthanorPlayerCharacter
@@ -49,10 +51,16 @@ class AthanorAccount(*MIXINS, HasAttributeGetCreate, HasRenderExamine, EventEmit
         if not new_email:
             raise ValueError("Must set an email address!")
         new_email = AthanorAccount.objects.normalize_email(new_email)
-        if AthanorAccount.objects.filter_family(email__iexact=new_email).exclude(id=self.id).count():
+        normalized = AccountEmail.normalize(new_email)
+        if AccountEmail.email_in_use(normalized, exclude=self):
+            raise ValueError("This email address is already in use!")
+        try:
+            with transaction.atomic():
+                self.email = new_email
+                self.save(update_fields=['email'])
+                AccountEmail.objects.update_or_create(db_account=self, defaults={'db_email': normalized})
+        except IntegrityError:
             raise ValueError("This email address is already in use!")
-        self.email = new_email
-        self.save(update_fields=['email'])
         return new_email
 
     def render_examine(self, viewer, callback=True):
@@ -132,25 +140,53 @@ class AthanorAccount(*MIXINS, HasAttributeGetCreate, HasRenderExamine, EventEmit
     def create_account(cls, *args, **kwargs):
         if not (email := kwargs.get('email', '')):
             raise ValueError("Must include an email!")
-        if AthanorAccount.objects.filter_family(email__iexact=email).count():
+        normalized = AccountEmail.normalize(email)
+        if AccountEmail.email_in_use(normalized):
             raise ValueError("Email is already in use by another account!")
-        account, errors = cls.create(*args, **kwargs)
-        if account:
-            return account
-        else:
-            raise ValueError(errors)
+        created = list()
+        try:
+            with transaction.atomic():
+                account, errors = cls.create(*args, **kwargs)
+                if not account:
+                    raise ValueError(errors)
+                created.append(account)
+                created.extend(obj for obj in (account.db._last_puppet, *(account.db._playable_characters or ()))
+                               if obj is not None)
+                # index_account_email has already indexed the address, unless somebody else
+                # registered it in the meantime.
+                if not AccountEmail.objects.filter(db_account=account, db_email=normalized).exists():
+                    raise ValueError("Email is already in use by another account!")
+        except Exception:
+            cls.forget_rolled_back(created)
+            raise
+        return account
+
+    @staticmethod
+    def forget_rolled_back(objs):
+        """
+        Removes entities whose creation was rolled back from the idmapper, so that nothing can
+        find them again with no rows behind them.
+
+        Args:
+            objs (iterable): Typeclassed entities.
+
+        Returns:
+            None
+        """
+        for obj in set(objs):
+            obj.flush_from_cache(force=True)
 
     def at_post_disconnect(self, **kwargs):
         super().at_post_disconnect(**kwargs)
-        self.emit_global("account_disconnect")
+        self.fire_global("account_disconnect")
         if not self.sessions.all():
-            self.emit_global("account_offline")
+            self.fire_global("account_offline")
 
     def at_post_login(self, session=None, **kwargs):
         super().at_post_login(session, **kwargs)
-        self.emit_global("account_connect", session=session)
+        self.fire_global("account_connect", session=session)
         if len(self.sessions.all()) == 1:
-            self.emit_global("account_online", session=session)
+            self.fire_global("account_online", session=session)
 
     def rename(self, new_name):
         new_name = self.normalize_username(new_name)
@@ -454,10 +454,10 @@ class AthanorBaseObjectMixin(HasRenderExamine, EventEmitter):
         """
         self.account.db._last_puppet = self
         for pref in self.hook_prefixes:
-            self.emit_global(f"{pref}_puppet", **kwargs)
+            self.fire_global(f"{pref}_puppet", **kwargs)
         if len(self.sessions.all()) == 1:
             for pref in self.hook_prefixes:
-                self.emit_global(f"{pref}_online")
+                self.fire_global(f"{pref}_online")
 
 
     def at_post_unpuppet(self, account, session=None, **kwargs):
@@ -474,11 +474,11 @@ class AthanorBaseObjectMixin(HasRenderExamine, EventEmitter):
         """
         super().at_post_unpuppet(account, session, **kwargs)
         for pref in self.hook_prefixes:
-            self.emit_global(f"{pref}_unpuppet", account=account, session=session, **kwargs)
+            self.fire_global(f"{pref}_unpuppet", account=account, session=session, **kwargs)
 
         if not self.sessions.all():
             for pref in self.hook_prefixes:
-                self.emit_global(f"{pref}_offline")
+                self.fire_global(f"{pref}_offline")
 
         if session:
             session.msg(f"You cease controlling |c{self}|n")
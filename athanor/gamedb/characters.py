@@ -1,6 +1,7 @@
 import re
 
 from django.conf import settings
+from django.db import transaction, IntegrityError
 from evennia.utils.utils import class_from_module
 from evennia.utils.ansi import ANSIString
 
@@ -22,6 +23,25 @@ class AthanorPlayerCharacter(*MIXINS, AthanorBasePlayerMixin, AthanorObject):
     lockstring = "puppet:pid({account_id}) or pperm(Developer);delete:pperm(Developer)"
     re_name = re.compile(r"(?i)^([A-Z]|[0-9]|\.|-|')+( ([A-Z]|[0-9]|\.|-|')+)*$")
 
+    @classmethod
+    def validate_name(cls, key):
+        """
+        Checks that a prospective name is well-formed. Does not check whether it's in use.
+
+        Args:
+            key (str): The name. Can include ANSI codes.
+
+        Returns:
+            key (ANSIString), clean_key (str): The name with and without ANSI codes.
+        """
+        key = ANSIString(key)
+        clean_key = str(key.clean())
+        if '|' in clean_key:
+            raise ValueError("Malformed ANSI in Character Name.")
+        if not cls.re_name.match(clean_key):
+            raise ValueError("Character name does not meet standards. Avoid double spaces and special characters.")
+        return key, clean_key
+
     def create_bridge(self, account, key, clean_key, namespace):
         """
         Creates the Django Model that will hold extra information about Player Characters.
@@ -61,45 +81,59 @@ class AthanorPlayerCharacter(*MIXINS, AthanorBasePlayerMixin, AthanorObject):
             raise ValueError("Characters must have a name!")
         if not account:
             raise ValueError("Characters must belong to an Account!")
-        key = ANSIString(key)
-        clean_key = str(key.clean())
-        if '|' in clean_key:
-            raise ValueError("Malformed ANSI in Character Name.")
-        if not cls.re_name.match(clean_key):
-            raise ValueError("Character name does not meet standards. Avoid double spaces and special characters.")
-        if namespace is not None and CharacterBridge.objects.filter(db_iname=clean_key.lower(), db_namespace=namespace).count():
-            raise ValueError("Name conflicts with another Character.")
+        key, clean_key = cls.validate_name(key)
+        # Name uniqueness is checked beforehand by the Character Controller. The database's
+        # unique constraint on the bridge is the final guard.
         character, errors = cls.create(clean_key, account, **kwargs)
-        if character:
-            character.create_bridge(account, key, clean_key, namespace)
-        else:
+        if not character:
             raise ValueError(errors)
+        try:
+            with transaction.atomic():
+                character.create_bridge(account, key, clean_key, namespace)
+        except IntegrityError:
+            character.delete()
+            raise ValueError("Name conflicts with another Character.")
         return character
 
-    def rename(self, key):
+    def save_bridge(self, key, clean_key, namespace):
         """
-        Renames a character and updates all relevant fields.
+        Saves a name and namespace to the CharacterBridge, then renames the character to match.
+        The database refuses names already used in the namespace.
 
         Args:
-            key (str): The character's new name. Can include ANSI codes.
+            key (ANSIString): The name, possibly including color codes.
+            clean_key (str): The name without color codes.
+            namespace (int or None): The namespace to place the character in.
 
         Returns:
-            key (ANSIString): The successful key set.
+            None
         """
-        key = ANSIString(key)
-        clean_key = str(key.clean())
-        if '|' in clean_key:
-            raise ValueError("Malformed ANSI in Character Name.")
-        if not self.re_name.match(clean_key):
-            raise ValueError("Character name does not meet standards. Avoid double spaces and special characters.")
         bridge = self.character_bridge
-        if CharacterBridge.objects.filter(character_bridge__db_namespace=0, db_iname=clean_key.lower()).exclude(id=bridge).count():
-            raise ValueError("Name conflicts with another Character.")
-        self.key = clean_key
+        old_values = (bridge.db_name, bridge.db_iname, bridge.db_cname, bridge.db_namespace)
         bridge.db_name = clean_key
         bridge.db_iname = clean_key.lower()
         bridge.db_cname = key
-        bridge.save(update_fields=['db_name', 'db_iname', 'db_cname'])
+        bridge.db_namespace = namespace
+        try:
+            with transaction.atomic():
+                bridge.save(update_fields=['db_name', 'db_iname', 'db_cname', 'db_namespace'])
+        except IntegrityError:
+            bridge.db_name, bridge.db_iname, bridge.db_cname, bridge.db_namespace = old_values
+            raise ValueError("Name conflicts with another Character.")
+        self.key = clean_key
+
+    def rename(self, key):
+        """
+        Renames a character and updates all relevant fields.
+
+        Args:
+            key (str): The character's new name. Can include ANSI codes.
+
+        Returns:
+            key (ANSIString): The successful key set.
+        """
+        key, clean_key = self.validate_name(key)
+        self.save_bridge(key, clean_key, self.character_bridge.db_namespace)
         return key
 
     def basetype_setup(self):
@@ -148,14 +182,15 @@ class AthanorPlayerCharacter(*MIXINS, AthanorBasePlayerMixin, AthanorObject):
             None
         """
         old_name = self.key
+        bridge = self.character_bridge
         if not replace_name:
             try:
-                self.character_bridge.namespace = 0
-            except Exception as e:
+                self.save_bridge(bridge.db_cname, bridge.db_name, 0)
+            except ValueError:
                 raise ValueError("Cannot restore character. Does another character use the same name?")
         else:
-            self.rename(replace_name)
-            self.character_bridge.namespace = 0
+            key, clean_key = self.validate_name(replace_name)
+            self.save_bridge(key, clean_key, 0)
         self.at_restore(old_name, replace_name)
 
     def at_restore(self, old_name, replace_name):
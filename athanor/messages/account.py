@@ -120,3 +120,67 @@ class ForceDisconnect(AccountMessage):
         'account': "|w{enactor_name}|n booted you for the reasoning: {reason}",
         'admin': "|w{enactor_name}|n booted Account: |w{account_name}|n under reasoning: {reason}"
     }
+
+
+class BatchAccountMessage(AdminMessage):
+    """
+    Reports an operation on many Accounts at once. Formatted with {count} and {account_names}.
+    """
+    system_name = "ACCOUNT"
+    targets = ['enactor', 'accounts', 'admin']
+
+
+class BatchDisableMessage(BatchAccountMessage):
+    messages = {
+        'enactor': "Successfully disabled {count} Accounts: |w{account_names}|n under reasoning: {reason}",
+        'accounts': "|w{enactor_name}|n disabled your Account due to: {reason}",
+        'admin': "|w{enactor_name}|n disabled {count} Accounts: |w{account_names}|n under reasoning: {reason}"
+    }
+
+
+class BatchEnableMessage(BatchAccountMessage):
+    messages = {
+        'enactor': "Successfully re-enabled {count} Accounts: |w{account_names}|n.",
+        'accounts': "|w{enactor_name}|n re-enabled your Account.",
+        'admin': "|w{enactor_name}|n re-enabled {count} Accounts: |w{account_names}|n."
+    }
+
+
+class BatchBanMessage(BatchAccountMessage):
+    messages = {
+        'enactor': "Successfully banned {count} Accounts: |w{account_names}|n for {duration} - until {ban_date} - under reasoning: {reason}",
+        'accounts': "|w{enactor_name}|n banned your Account for {duration} - until {ban_date} - due to: {reason}",
+        'admin': "|w{enactor_name}|n banned {count} Accounts: |w{account_names}|n for {duration} - until {ban_date} - under reasoning: {reason}"
+    }
+
+
+class BatchUnBanMessage(BatchAccountMessage):
+    messages = {
+        'enactor': "Successfully un-banned {count} Accounts: |w{account_names}|n.",
+        'accounts': "|w{enactor_name}|n un-banned your Account.",
+        'admin': "|w{enactor_name}|n un-banned {count} Accounts: |w{account_names}|n."
+    }
+
+
+class BatchGrantMessage(BatchAccountMessage):
+    messages = {
+        'enactor': "Successfully granted {count} Accounts: |w{account_names}|n the Permission: |w{perm}|n",
+        'accounts': "|w{enactor_name}|n granted your Account the Permission: |w{perm}|n",
+        'admin': "|w{enactor_name}|n granted {count} Accounts: |w{account_names}|n the Permission: |w{perm}|n"
+    }
+
+
+class BatchRevokeMessage(BatchAccountMessage):
+    messages = {
+        'enactor': "Successfully revoked {count} Accounts: |w{account_names}|n's use of the Permission: |w{perm}|n",
+        'accounts': "|w{enactor_name}|n revoked your Account's use of the Permission: |w{perm}|n",
+        'admin': "|w{enactor_name}|n revoked {count} Accounts: |w{account_names}|n's use of the Permission: |w{perm}|n"
+    }
+
+
+class BatchForceDisconnect(BatchAccountMessage):
+    messages = {
+        'enactor': "Successfully booted {count} Accounts: |w{account_names}|n under reasoning: {reason}",
+        'accounts': "|w{enactor_name}|n booted you for the reasoning: {reason}",
+        'admin': "|w{enactor_name}|n booted {count} Accounts: |w{account_names}|n under reasoning: {reason}"
+    }
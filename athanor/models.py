@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.signals import post_save
 from evennia.typeclasses.models import SharedMemoryModel
 
 
@@ -37,3 +38,63 @@ class AlternateNamespace(SharedMemoryModel):
         verbose_name = 'Namespace'
         verbose_name_plural = 'Namespaces'
         unique_together = (('db_namespace', 'db_object'), ('db_namespace', 'db_iname'))
+
+
+class AccountEmail(SharedMemoryModel):
+    """
+    A normalized copy of each Account's email address with a unique index, so that the database
+    enforces that no two indexed Accounts share an address. See email_in_use().
+    """
+    db_account = models.OneToOneField('accounts.AccountDB', related_name='email_index', primary_key=True,
+                                      on_delete=models.CASCADE)
+    db_email = models.CharField(max_length=254, null=False, blank=False, unique=True)
+
+    class Meta:
+        verbose_name = 'Account Email'
+        verbose_name_plural = 'Account Emails'
+
+    @staticmethod
+    def normalize(email):
+        """
+        Email addresses are compared case-insensitively.
+
+        Args:
+            email (str): An email address.
+
+        Returns:
+            normalized (str)
+        """
+        return email.strip().lower()
+
+    @classmethod
+    def email_in_use(cls, normalized, exclude=None):
+        """
+        Whether an Account other than exclude has this address, according to the index.
+
+        Args:
+            normalized (str): A normalized email address.
+            exclude (AccountDB or None): An Account whose own address doesn't count.
+
+        Returns:
+            in_use (bool)
+        """
+        found = cls.objects.filter(db_email=normalized)
+        if exclude is not None:
+            found = found.exclude(db_account=exclude)
+        return found.exists()
+
+
+def index_account_email(sender, instance, created, raw=False, **kwargs):
+    """
+    Indexes the address of every new Account, including those made by Evennia's own commands.
+    An address that's already taken is left out of the index, as backfill_email_index does.
+    Connected without a sender, since typeclassed Accounts are saved as proxies of AccountDB.
+    """
+    if not created or raw or instance._meta.concrete_model._meta.label != 'accounts.AccountDB' or not instance.email:
+        return
+    AccountEmail.objects.bulk_create([AccountEmail(db_account_id=instance.id,
+                                                   db_email=AccountEmail.normalize(instance.email))],
+                                     ignore_conflicts=True)
+
+
+post_save.connect(index_account_email, dispatch_uid='athanor_index_account_email')
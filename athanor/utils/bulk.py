@@ -0,0 +1,154 @@
+"""
+Bulk Attribute and Tag writes across many typeclassed entities of the same kind.
+
+AttributeHandler and TagHandler work on one entity at a time, costing several queries each.
+These helpers write the rows for every entity in a handful of queries. They don't touch the
+handlers' caches; call reset_caches() once the surrounding transaction has committed.
+"""
+from django.db import connection
+
+from evennia.typeclasses.attributes import Attribute
+from evennia.typeclasses.tags import Tag
+from evennia.utils.dbserialize import to_pickle
+
+
+def _model_info(objs):
+    """
+    Returns:
+        dbclass (Model), field (str): The entities' database model, and the name of the foreign
+            key to it on that model's m2m through tables.
+    """
+    dbclass = objs[0].__dbclass__
+    return dbclass, f"{dbclass.__name__.lower()}_id"
+
+
+def attribute_holders(objs, key, category=None):
+    """
+    Args:
+        objs (list): Typeclassed entities of the same kind.
+        key (str): The Attribute key.
+        category (str or None): The Attribute category.
+
+    Returns:
+        ids (set): The ids of the objs that have the Attribute.
+    """
+    if not objs:
+        return set()
+    dbclass, field = _model_info(objs)
+    through = dbclass.db_attributes.through
+    found = through.objects.filter(**{f"{field}__in": [obj.id for obj in objs]}, attribute__db_key=key,
+                                   attribute__db_category=category)
+    return set(found.values_list(field, flat=True))
+
+
+def delete_attributes(objs, keys, category=None):
+    """
+    Deletes Attributes from every entity in objs.
+
+    Args:
+        objs (list): Typeclassed entities of the same kind.
+        keys (iterable of str): The Attribute keys.
+        category (str or None): The Attribute category.
+
+    Returns:
+        None
+    """
+    if not objs:
+        return
+    dbclass, field = _model_info(objs)
+    through = dbclass.db_attributes.through
+    found = through.objects.filter(**{f"{field}__in": [obj.id for obj in objs]}, attribute__db_key__in=list(keys),
+                                   attribute__db_category=category)
+    Attribute.objects.filter(id__in=list(found.values_list('attribute_id', flat=True))).delete()
+
+
+def set_attributes(objs, values, category=None):
+    """
+    Sets the same Attributes on every entity in objs, replacing any that already exist.
+    Must be called within a transaction.
+
+    Args:
+        objs (list): Typeclassed entities of the same kind.
+        values (dict): Attribute key -> value.
+        category (str or None): The Attribute category.
+
+    Returns:
+        None
+    """
+    if not objs:
+        return
+    delete_attributes(objs, values.keys(), category=category)
+    dbclass, field = _model_info(objs)
+    model = dbclass.__name__.lower()
+    values = {key: to_pickle(value) for key, value in values.items()}
+    attributes = [Attribute(db_key=key, db_value=value, db_category=category, db_model=model, db_attrtype=None)
+                  for obj in objs for key, value in values.items()]
+    if connection.features.can_return_rows_from_bulk_insert:
+        created = Attribute.objects.bulk_create(attributes)
+    else:
+        # This backend doesn't report the ids of bulk-created rows, and there's no safe way to
+        # find them afterwards, so they're saved one at a time within the caller's transaction.
+        for attribute in attributes:
+            attribute.save()
+        created = attributes
+    through = dbclass.db_attributes.through
+    attrs = iter(created)
+    through.objects.bulk_create([through(**{field: obj.id}, attribute_id=next(attrs).id)
+                                 for obj in objs for _ in values])
+
+
+def add_tag(objs, key, category=None, tagtype=None):
+    """
+    Adds a Tag to every entity in objs that doesn't already have it.
+
+    Args:
+        objs (list): Typeclassed entities of the same kind.
+        key (str): The Tag key. It's lowercased, as TagHandler does.
+        category (str or None): The Tag category.
+        tagtype (str or None): The kind of Tag, such as 'permission'.
+
+    Returns:
+        None
+    """
+    if not objs:
+        return
+    dbclass, field = _model_info(objs)
+    tag, created = Tag.objects.get_or_create(db_key=key.strip().lower(), db_category=category,
+                                             db_tagtype=tagtype, db_model=dbclass.__name__.lower())
+    through = dbclass.db_tags.through
+    existing = set() if created else set(through.objects.filter(**{f"{field}__in": [obj.id for obj in objs]},
+                                                                tag=tag).values_list(field, flat=True))
+    through.objects.bulk_create([through(**{field: obj.id}, tag_id=tag.id) for obj in objs if obj.id not in existing])
+
+
+def remove_tag(objs, key, category=None, tagtype=None):
+    """
+    Removes a Tag from every entity in objs.
+
+    Args:
+        objs (list): Typeclassed entities of the same kind.
+        key (str): The Tag key.
+        category (str or None): The Tag category.
+        tagtype (str or None): The kind of Tag, such as 'permission'.
+
+    Returns:
+        None
+    """
+    if not objs:
+        return
+    dbclass, field = _model_info(objs)
+    through = dbclass.db_tags.through
+    through.objects.filter(**{f"{field}__in": [obj.id for obj in objs]}, tag__db_key=key.strip().lower(),
+                           tag__db_category=category, tag__db_tagtype=tagtype,
+                           tag__db_model=dbclass.__name__.lower()).delete()
+
+
+def reset_caches(objs):
+    """
+    Makes each entity's Attribute and Tag handlers forget what they've cached, so that bulk
+    writes are seen.
+    """
+    for obj in objs:
+        obj.attributes.reset_cache()
+        obj.tags.reset_cache()
+        obj.permissions.reset_cache()
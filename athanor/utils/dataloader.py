@@ -0,0 +1,223 @@
+"""
+Parses game data files.
+
+Kept free of Django and Evennia imports so that parse_file can run in worker processes
+without configuring either.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+from yaml.composer import Composer
+from yaml.events import MappingStartEvent, MappingEndEvent, StreamEndEvent
+from yaml.nodes import MappingNode
+
+try:
+    # libyaml's loader is many times faster than the pure-Python one.
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+class StreamLoader(SafeLoader):
+    """
+    A SafeLoader that can be walked event by event, composing and constructing one node at a
+    time. libyaml's loader only composes whole documents, so the pure-Python Composer's node
+    methods are borrowed; they only need the parser's event methods, which both loaders have.
+    """
+    compose_node = Composer.compose_node
+    compose_scalar_node = Composer.compose_scalar_node
+    compose_sequence_node = Composer.compose_sequence_node
+    compose_mapping_node = Composer.compose_mapping_node
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.anchors = dict()
+
+    def next_data(self):
+        """
+        Returns:
+            data (any): The next node, constructed.
+        """
+        return self.construct_document(self.compose_node(None, None))
+
+    def iter_mapping(self):
+        """
+        Constructs the mapping that's next one entry at a time. If it has an anchor, its nodes
+        are kept, so that later aliases to it work. Only such mappings are held whole.
+
+        Yields:
+            key (any), value (any)
+        """
+        start = self.get_event()
+        node = None
+        if start.anchor is not None:
+            tag = start.tag
+            if tag is None or tag == '!':
+                tag = self.resolve(MappingNode, None, start.implicit)
+            node = MappingNode(tag, [], start.start_mark, None, flow_style=start.flow_style)
+            self.anchors[start.anchor] = node
+        while not self.check_event(MappingEndEvent):
+            key_node = self.compose_node(node, None)
+            value_node = self.compose_node(node, key_node)
+            if node is not None:
+                node.value.append((key_node, value_node))
+            yield self.construct_document(key_node), self.construct_document(value_node)
+        end = self.get_event()
+        if node is not None:
+            node.end_mark = end.end_mark
+
+
+def find_files(data_path, prefix=tuple()):
+    """
+    Recursively lists the files in a data directory, in a stable order.
+
+    Args:
+        data_path (str): The directory to scan.
+        prefix (tuple): The keys leading to data_path.
+
+    Returns:
+        files (list): (keys, file path) pairs. keys is the tuple of lowercased directory names
+            and the file's name without extension, where its data belongs.
+    """
+    found = list()
+    for node in sorted(os.scandir(data_path), key=lambda entry: entry.name):
+        node_name = node.name.lower()
+        if node.is_dir():
+            found.extend(find_files(node.path, prefix + (node_name,)))
+        elif node.is_file():
+            found.append((prefix + (node_name.split('.', 1)[0],), node.path))
+    return found
+
+
+def parse_file(file_path, merge=False):
+    """
+    Parses one file. YAML files may contain several documents. Normally a section in a later
+    document replaces the same section in an earlier one.
+
+    Args:
+        file_path (str): The file.
+        merge (bool): Combine documents as iter_entries does instead: a section that is a
+            mapping in both gets the later document's entries added to it, and anything else
+            is replaced. Used for map files, so that they load the same whether or not
+            they're streamed.
+
+    Returns:
+        data (dict), elapsed (float): The parsed data and the seconds it took.
+    """
+    start = time.perf_counter()
+    data = dict()
+    name = file_path.lower()
+    with open(file_path, "r") as data_file:
+        if name.endswith(".yaml"):
+            for entry in yaml.load_all(data_file, Loader=SafeLoader):
+                if not entry:
+                    continue
+                if not merge:
+                    data.update(entry)
+                    continue
+                for section, value in entry.items():
+                    if isinstance(value, dict) and isinstance(data.get(section, None), dict):
+                        data[section].update(value)
+                    else:
+                        data[section] = value
+        elif name.endswith(".json"):
+            data = json.load(data_file)
+    return data, time.perf_counter() - start
+
+
+def file_digest(file_path):
+    """
+    Args:
+        file_path (str): The file.
+
+    Returns:
+        digest (str): A hash of the file's contents.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as data_file:
+        while (chunk := data_file.read(1 << 20)):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_entries(file_path, whole=tuple()):
+    """
+    Reads a YAML file of top-level sections one entry at a time, without ever holding the whole
+    file in memory. Only one entry is parsed at a time.
+
+    A file containing several documents is read as if their sections were combined, entry by
+    entry, as parse_file combines them when merging. Sections listed in whole are yielded once
+    per document, for the caller to combine. Merge keys (<<) directly inside a section aren't
+    supported. Aliases may refer to anchors anywhere earlier in the document, including on a
+    section, though an anchored section is held in memory whole.
+
+    Args:
+        file_path (str): The file.
+        whole (iterable of str): Sections to read as a single entry, with a key of None.
+
+    Yields:
+        section (str), key (any), entry (any): Sections that aren't mappings are yielded whole,
+            with a key of None.
+    """
+    with open(file_path, "r") as data_file:
+        loader = StreamLoader(data_file)
+        try:
+            loader.get_event()
+            while not loader.check_event(StreamEndEvent):
+                loader.get_event()
+                if loader.check_event(MappingStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(MappingEndEvent):
+                        section = loader.next_data()
+                        if section in whole or not loader.check_event(MappingStartEvent):
+                            yield section, None, loader.next_data()
+                            continue
+                        for key, entry in loader.iter_mapping():
+                            yield section, key, entry
+                    loader.get_event()
+                elif (data := loader.next_data()):
+                    raise ValueError(f"{file_path} must contain mappings of sections, not {type(data).__name__}.")
+                loader.get_event()
+                loader.anchors = dict()
+        finally:
+            loader.dispose()
+
+
+def fingerprint(data):
+    """
+    A hash of parsed data, for noticing whether it changed. Equal data built in a different
+    order may produce a different fingerprint, which only costs an unnecessary rebuild.
+
+    Returns:
+        digest (bytes)
+    """
+    return hashlib.sha1(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)).digest()
+
+
+def parse_files(file_paths, processes=1, threshold=0, merge=frozenset()):
+    """
+    Parses many files, in a process pool if there are enough of them to be worth it. Workers are
+    spawned rather than forked, since this may be called from a thread of a server whose other
+    threads hold locks that a forked child would inherit locked.
+
+    Args:
+        file_paths (list): The files.
+        processes (int): Worker processes. 1 or less parses in this process.
+        threshold (int): Use the pool only for at least this many files.
+        merge (set): The files whose documents parse_file should merge.
+
+    Returns:
+        results (list): (data, elapsed) for each file, in the same order as file_paths.
+    """
+    if processes <= 1 or len(file_paths) < max(threshold, 2):
+        return [parse_file(file_path, file_path in merge) for file_path in file_paths]
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        chunksize = max(1, len(file_paths) // (processes * 4))
+        return list(pool.map(parse_file, file_paths, [file_path in merge for file_path in file_paths],
+                             chunksize=chunksize))
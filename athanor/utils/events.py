@@ -1,40 +1,610 @@
-from collections import defaultdict
-from django.dispatch import Signal
+import weakref
+from collections import defaultdict, deque
+from functools import partial
+from time import perf_counter
+
+from django.conf import settings
+from twisted.internet import reactor
+
 from athanor.utils.time import utcnow
-from evennia.utils.utils import lazy_property
+from evennia.utils.logger import log_trace, log_warn
+
+
+class EventListener(object):
+    """
+    A single registered callback. Callbacks are held by weak reference (like Django Signals
+    did) so that listening to an event never keeps an object alive.
+
+    A listener may be filtered by sender_class (only senders that are instances of it will be
+    heard) and by predicate (a callable that receives the sender and returns True if the event
+    should be heard). The predicate is held normally, not weakly.
+    """
+    __slots__ = ('key', 'ref', 'sender_class', 'predicate')
+
+    def __init__(self, callback, on_dead=None, weak=True, sender_class=None, predicate=None):
+        self.sender_class = sender_class
+        self.predicate = predicate
+        if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+            self.key = (id(callback.__self__), id(callback.__func__))
+            self.ref = weakref.WeakMethod(callback, on_dead) if weak else StrongRef(callback)
+        else:
+            self.key = id(callback)
+            self.ref = weakref.ref(callback, on_dead) if weak else StrongRef(callback)
+
+
+class StrongRef(object):
+    """
+    Mimics the weakref API for callbacks connected with weak=False.
+    """
+    __slots__ = ('callback',)
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def __call__(self):
+        return self.callback
+
+
+def callback_name(callback):
+    """
+    Generates a readable, stable name for an event listener.
+
+    Args:
+        callback (callable): The listener.
+
+    Returns:
+        name (str)
+    """
+    func = getattr(callback, '__func__', callback)
+    return f"{getattr(func, '__module__', '?')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+class HandlerStats(object):
+    """
+    Call count and latency figures for a single listener of a single event.
+    Only the most recent samples are kept for percentiles.
+    """
+    __slots__ = ('calls', 'total', 'worst', 'samples')
+
+    def __init__(self, max_samples):
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def record(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.worst:
+            self.worst = elapsed
+        self.samples.append(elapsed)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+    def dump(self):
+        return {
+            'calls': self.calls,
+            'total': self.total,
+            'mean': self.total / self.calls if self.calls else 0.0,
+            'max': self.worst,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class EventStats(object):
+    """
+    Optional instrumentation for an EventManager. Counts how often each event is emitted,
+    how often each listener is called, and how long listeners take. Listeners that take
+    longer than slow_threshold seconds are logged.
+    """
+
+    def __init__(self, slow_threshold=0.0, max_samples=500, max_slow=100):
+        """
+        Args:
+            slow_threshold (float): Seconds. Listeners slower than this are logged. 0 disables.
+            max_samples (int): How many recent latency samples are kept per listener.
+            max_slow (int): How many recent slow calls are kept for display.
+        """
+        self.slow_threshold = slow_threshold
+        self.max_samples = max_samples
+        self.started = utcnow()
+        self.emits = defaultdict(int)
+        self.handlers = defaultdict(dict)
+        self.slow = deque(maxlen=max_slow)
+
+    def record_emit(self, event):
+        self.emits[event] += 1
+
+    def record_call(self, event, callback, elapsed):
+        name = callback_name(callback)
+        if (stats := self.handlers[event].get(name, None)) is None:
+            stats = HandlerStats(self.max_samples)
+            self.handlers[event][name] = stats
+        stats.record(elapsed)
+        if self.slow_threshold and elapsed >= self.slow_threshold:
+            self.slow.append((utcnow(), event, name, elapsed))
+            log_warn(f"Slow event handler: {name} took {elapsed * 1000:.2f}ms to handle {event}")
+
+    def dump(self):
+        """
+        Produces a machine-readable (JSON-compatible) report of everything collected.
+
+        Returns:
+            report (dict)
+        """
+        return {
+            'started': self.started.isoformat(),
+            'slow_threshold': self.slow_threshold,
+            'events': {event: {'emits': count,
+                               'handlers': {name: stats.dump() for name, stats in self.handlers[event].items()}}
+                       for event, count in self.emits.items()},
+            'slow': [{'timestamp': stamp.isoformat(), 'event': event, 'handler': name, 'elapsed': elapsed}
+                     for stamp, event, name, elapsed in self.slow]
+        }
 
 
 class EventManager(object):
+    """
+    A lightweight event bus.
 
-    def __init__(self):
-        self.events = defaultdict(Signal)
+    Listeners are stored per event name. Each event also has compiled tables, one per sender
+    class that has emitted it: flat tuples of the references that care about that class of
+    sender. They are rebuilt only when the event's listeners change, so emitting an event is
+    a loop over a tuple rather than a trip through django.dispatch.Signal's locking and weakref
+    bookkeeping, and listeners filtered to other sender classes cost nothing.
 
-    def get_event(self, event):
-        return self.events[event]
+    Events may be dispatched in one of two modes:
+        sync: Every listener is called immediately, inside the call to emit().
+        deferred: The event is placed on a queue that is drained in batches on
+            later reactor ticks. emit() returns an empty tuple, as nobody has
+            heard the event yet.
 
-    def on(self, obj, event, callback):
-        sig = self.get_event(event)
-        return sig.connect(callback)
+    Pairs of opposite events (such as account_online/account_offline) may be coalesced. Such
+    events are held for a short window. If the same sender emits the opposite event before the
+    window closes, both are dropped, so listeners never see a sender flap offline and back online.
 
-    def emit(self, obj, event, **kwargs):
-        sig = self.get_event(event)
+    Listeners are called as callback(sender=obj, event=event, event_timestamp=datetime, **kwargs).
+    The event_timestamp is only generated if somebody is listening.
+    """
+    dispatch_modes = ('sync', 'deferred')
+
+    def __init__(self, dispatch=None, default_dispatch='sync', batch_size=100, coalesce=None, coalesce_window=0.0):
+        """
+        Args:
+            dispatch (dict or None): A dictionary of event name -> dispatch mode.
+            default_dispatch (str): The dispatch mode of events not in dispatch.
+            batch_size (int): How many deferred events are delivered per reactor tick.
+            coalesce (list or None): A list of (event, opposite event) pairs to coalesce.
+            coalesce_window (float): Seconds to hold coalesced events. 0 disables coalescing.
+        """
+        self.listeners = defaultdict(list)
+        self.tables = dict()
+        self.dispatch = dict()
+        self.default_dispatch = default_dispatch
+        self.batch_size = batch_size
+        self.queue = deque()
+        self.drain_call = None
+        self.stats = None
+        self.sinks = list()
+        self.coalesce_window = coalesce_window
+        self.opposites = dict()
+        self.pending = dict()
+        if dispatch:
+            for event, mode in dispatch.items():
+                self.set_dispatch(event, mode)
+        if coalesce:
+            for event, opposite in coalesce:
+                self.set_coalesce(event, opposite)
+
+    def set_dispatch(self, event, mode):
+        """
+        Sets whether an event is delivered synchronously or deferred to a later tick.
+
+        Args:
+            event (str): The event name.
+            mode (str): 'sync' or 'deferred'.
+
+        Returns:
+            None
+        """
+        if mode not in self.dispatch_modes:
+            raise ValueError(f"Unsupported dispatch mode '{mode}' for event {event}!")
+        self.dispatch[event] = mode
+
+    def is_deferred(self, event):
+        return self.dispatch.get(event, self.default_dispatch) == 'deferred'
+
+    def set_coalesce(self, event, opposite):
+        """
+        Declares two events to be opposite transitions that should be coalesced.
+
+        Args:
+            event (str): An event name, such as 'account_online'.
+            opposite (str): Its opposite, such as 'account_offline'.
+
+        Returns:
+            None
+        """
+        pair = tuple(sorted((event, opposite)))
+        self.opposites[event] = (pair, opposite)
+        self.opposites[opposite] = (pair, event)
+
+    def coalesce(self, obj, event, kwargs):
+        """
+        Holds an event for the coalescing window, or cancels it against a held opposite.
+
+        Returns:
+            absorbed (bool): True if the event was held or cancelled and must not be dispatched now.
+        """
+        if not self.coalesce_window or (found := self.opposites.get(event, None)) is None:
+            return False
+        pair, opposite = found
+        key = (id(obj), pair)
+        if (held := self.pending.get(key, None)) is not None:
+            if held[1] == opposite:
+                # The sender flapped back. Neither transition needs to be heard.
+                del self.pending[key]
+                if held[3].active():
+                    held[3].cancel()
+            return True
         kwargs['event_timestamp'] = utcnow()
-        results = sig.send(obj, **kwargs)
-        return tuple([(r[0].__self__, r[1]) for r in results if r[0]])
+        call = reactor.callLater(self.coalesce_window, self.release, key)
+        self.pending[key] = (obj, event, kwargs, call)
+        return True
+
+    def release(self, key):
+        """
+        Dispatches a held event whose coalescing window has closed.
+        """
+        if (held := self.pending.pop(key, None)) is None:
+            return
+        obj, event, kwargs, call = held
+        if self.is_deferred(event):
+            self.enqueue(obj, event, kwargs)
+            return
+        try:
+            self.deliver(obj, event, kwargs)
+        except Exception:
+            log_trace()
+
+    def enable_stats(self, slow_threshold=0.0, max_samples=500):
+        """
+        Turns on instrumentation, discarding anything previously collected.
+
+        Args:
+            slow_threshold (float): Seconds. Listeners slower than this are logged. 0 disables.
+            max_samples (int): How many recent latency samples are kept per listener.
+
+        Returns:
+            stats (EventStats)
+        """
+        self.stats = EventStats(slow_threshold=slow_threshold, max_samples=max_samples)
+        return self.stats
+
+    def disable_stats(self):
+        self.stats = None
+
+    def add_sink(self, sink):
+        """
+        Adds a sink, such as an EventJournal. Sinks are told about every event as it is emitted,
+        via sink.record(obj, event, kwargs).
+        """
+        if sink not in self.sinks:
+            self.sinks.append(sink)
 
+    def remove_sink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
 
-EVENT_MANAGER = EventManager()
+    def on(self, obj, event, callback, weak=True, sender_class=None, predicate=None):
+        """
+        Registers a callback to an event. Registering the same callback twice does nothing.
+
+        Args:
+            obj (EventEmitter): The object registering the callback.
+            event (str): The event name.
+            callback (callable): The function or method to call.
+            weak (bool): Hold the callback by weak reference.
+            sender_class (type or tuple of types): If provided, only senders that are
+                instances of this will trigger the callback.
+            predicate (callable): If provided, called with the sender. The callback only
+                runs if it returns True.
+
+        Returns:
+            None
+        """
+        key = self.event_key(obj, event)
+        listener = EventListener(callback, on_dead=partial(self.listener_died, key), weak=weak,
+                                 sender_class=sender_class, predicate=predicate)
+        listeners = self.listeners[key]
+        if any(l.key == listener.key for l in listeners):
+            return
+        listeners.append(listener)
+        self.tables.pop(key, None)
+
+    def off(self, obj, event, callback):
+        """
+        Removes a callback from an event.
+
+        Args:
+            obj (EventEmitter): The object that registered the callback.
+            event (str): The event name.
+            callback (callable): The function or method to remove.
+
+        Returns:
+            None
+        """
+        key = self.event_key(obj, event)
+        callback_key = EventListener(callback, weak=False).key
+        if not (listeners := self.listeners.get(key, None)):
+            return
+        listeners[:] = [l for l in listeners if l.key != callback_key]
+        self.tables.pop(key, None)
+
+    def listener_died(self, key, ref):
+        if not (listeners := self.listeners.get(key, None)):
+            return
+        listeners[:] = [l for l in listeners if l.ref is not ref]
+        self.tables.pop(key, None)
+
+    def event_key(self, obj, event):
+        """
+        Determines what key an event's listeners are stored under.
+
+        Args:
+            obj (EventEmitter): The object emitting or listening.
+            event (str): The event name.
+
+        Returns:
+            key (hashable)
+        """
+        return event
+
+    def get_table(self, key, sender_class):
+        """
+        Retrieves the compiled table of an event for a given class of sender, compiling it
+        if necessary.
+
+        Args:
+            key (hashable): The event key. See event_key().
+            sender_class (type): The class of the sender.
+
+        Returns:
+            table (tuple): A tuple of (reference, predicate) pairs.
+        """
+        if not (listeners := self.listeners.get(key, None)):
+            # Nothing to compile, and caching it would keep an entry for every object that's
+            # ever emitted a local event.
+            return ()
+        if (tables := self.tables.get(key, None)) is None:
+            tables = dict()
+            self.tables[key] = tables
+        if (table := tables.get(sender_class, None)) is None:
+            table = tuple((l.ref, l.predicate) for l in listeners
+                          if l.sender_class is None or issubclass(sender_class, l.sender_class))
+            tables[sender_class] = table
+        return table
+
+    def emit(self, obj, event, **kwargs):
+        """
+        Fires an event and collects the responses of its listeners.
+
+        Returns:
+            results (tuple): A tuple of (listener, response) pairs. Empty if the event was deferred
+                or held for coalescing.
+        """
+        if self.stats is not None:
+            self.stats.record_emit(event)
+        if self.sinks:
+            for sink in self.sinks:
+                sink.record(obj, event, kwargs)
+        if event in self.opposites and self.coalesce(obj, event, kwargs):
+            return tuple()
+        if self.is_deferred(event):
+            self.enqueue(obj, event, kwargs)
+            return tuple()
+        return self.send(obj, event, kwargs)
+
+    def fire(self, obj, event, **kwargs):
+        """
+        Fire-and-forget version of emit(). Responses are not collected.
+
+        Returns:
+            None
+        """
+        if self.stats is not None:
+            self.stats.record_emit(event)
+        if self.sinks:
+            for sink in self.sinks:
+                sink.record(obj, event, kwargs)
+        if event in self.opposites and self.coalesce(obj, event, kwargs):
+            return
+        if self.is_deferred(event):
+            self.enqueue(obj, event, kwargs)
+            return
+        self.deliver(obj, event, kwargs)
+
+    def send(self, obj, event, kwargs):
+        if not (table := self.get_table(self.event_key(obj, event), obj.__class__)):
+            return tuple()
+        if 'event_timestamp' not in kwargs:
+            kwargs['event_timestamp'] = utcnow()
+        results = list()
+        stats = self.stats
+        for ref, predicate in table:
+            if predicate is not None and not predicate(obj):
+                continue
+            if (callback := ref()) is None:
+                continue
+            if stats is None:
+                result = callback(sender=obj, event=event, **kwargs)
+            else:
+                start = perf_counter()
+                result = callback(sender=obj, event=event, **kwargs)
+                stats.record_call(event, callback, perf_counter() - start)
+            results.append((getattr(callback, '__self__', callback), result))
+        return tuple(results)
+
+    def deliver(self, obj, event, kwargs):
+        if not (table := self.get_table(self.event_key(obj, event), obj.__class__)):
+            return
+        if 'event_timestamp' not in kwargs:
+            kwargs['event_timestamp'] = utcnow()
+        stats = self.stats
+        for ref, predicate in table:
+            if predicate is not None and not predicate(obj):
+                continue
+            if (callback := ref()) is None:
+                continue
+            if stats is None:
+                callback(sender=obj, event=event, **kwargs)
+            else:
+                start = perf_counter()
+                callback(sender=obj, event=event, **kwargs)
+                stats.record_call(event, callback, perf_counter() - start)
+
+    def enqueue(self, obj, event, kwargs):
+        # Nobody is listening, so there's nothing to deliver later.
+        if not self.get_table(self.event_key(obj, event), obj.__class__):
+            return
+        # A coalesced event released into the queue keeps the time it was emitted.
+        if 'event_timestamp' not in kwargs:
+            kwargs['event_timestamp'] = utcnow()
+        self.queue.append((obj, event, kwargs))
+        self.schedule_drain()
+
+    def schedule_drain(self):
+        if self.drain_call is None:
+            self.drain_call = reactor.callLater(0, self.drain)
+
+    def drain(self):
+        """
+        Delivers up to batch_size queued events. If any are left over, another drain
+        is scheduled for the next reactor tick so that a storm of events never
+        monopolizes the reactor.
+
+        Returns:
+            None
+        """
+        self.drain_call = None
+        for i in range(min(len(self.queue), self.batch_size)):
+            obj, event, kwargs = self.queue.popleft()
+            try:
+                self.deliver(obj, event, kwargs)
+            except Exception:
+                log_trace()
+        if self.queue:
+            self.schedule_drain()
+
+    def flush(self):
+        """
+        Delivers every queued or held event immediately. Used during server shutdown/reload
+        so that deferred events aren't lost.
+
+        Returns:
+            None
+        """
+        for key, held in list(self.pending.items()):
+            if held[3].active():
+                held[3].cancel()
+            self.release(key)
+        if self.drain_call is not None and self.drain_call.active():
+            self.drain_call.cancel()
+        self.drain_call = None
+        while self.queue:
+            obj, event, kwargs = self.queue.popleft()
+            try:
+                self.deliver(obj, event, kwargs)
+            except Exception:
+                log_trace()
+
+
+class LocalEventRegistry(EventManager):
+    """
+    A single, process-wide EventManager that serves the local events of every EventEmitter.
+
+    Listeners are stored under (id(emitter), event) keys, so an object that never listens to
+    a local event costs nothing, and one that does costs a few dictionary entries instead of
+    an entire EventManager of its own. Each emitter is tracked by weak reference: once it is
+    garbage collected (for instance, after being evicted from the idmapper), its entries are
+    purged automatically.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.owners = dict()
+
+    def event_key(self, obj, event):
+        return id(obj), event
+
+    def on(self, obj, event, callback, **kwargs):
+        owner_id = id(obj)
+        if (owner := self.owners.get(owner_id, None)) is None:
+            owner = (weakref.ref(obj, partial(self.owner_died, owner_id)), set())
+            self.owners[owner_id] = owner
+        owner[1].add(event)
+        return super().on(obj, event, callback, **kwargs)
+
+    def owner_died(self, owner_id, ref):
+        self.purge(owner_id)
+
+    def release_owner(self, obj):
+        """
+        Removes all local listeners belonging to an emitter.
+
+        Args:
+            obj (EventEmitter): The emitter being released.
+
+        Returns:
+            None
+        """
+        self.purge(id(obj))
+
+    def purge(self, owner_id):
+        if (owner := self.owners.pop(owner_id, None)) is None:
+            return
+        for event in owner[1]:
+            key = (owner_id, event)
+            self.listeners.pop(key, None)
+            self.tables.pop(key, None)
+
+
+LOCAL_EVENTS = LocalEventRegistry()
+
+EVENT_MANAGER = EventManager(dispatch=settings.EVENT_DISPATCH, default_dispatch=settings.EVENT_DISPATCH_DEFAULT,
+                             batch_size=settings.EVENT_DISPATCH_BATCH_SIZE, coalesce=settings.EVENT_COALESCE,
+                             coalesce_window=settings.EVENT_COALESCE_WINDOW)
+
+if settings.EVENT_INSTRUMENTATION:
+    EVENT_MANAGER.enable_stats(slow_threshold=settings.EVENT_SLOW_HANDLER_THRESHOLD,
+                               max_samples=settings.EVENT_INSTRUMENTATION_SAMPLES)
 
 
 class EventEmitter(object):
     _global_event_manager = EVENT_MANAGER
+    _local_event_manager = LOCAL_EVENTS
+
+    def at_idmapper_flush(self):
+        """
+        Releases this object's local event listeners when it's evicted from the idmapper.
+        """
+        if (parent := getattr(super(), 'at_idmapper_flush', None)) and not parent():
+            return False
+        self._local_event_manager.release_owner(self)
+        return True
 
-    @lazy_property
-    def _local_event_manager(self):
-        return EventManager()
+    def on_global(self, event, callback, weak=True, sender_class=None, predicate=None):
+        return self._global_event_manager.on(self, event, callback, weak=weak, sender_class=sender_class,
+                                             predicate=predicate)
 
-    def on_global(self, event, callback):
-        return self._global_event_manager.on(self, event, callback)
+    def off_global(self, event, callback):
+        return self._global_event_manager.off(self, event, callback)
 
     def test_global(self, event, **kwargs):
         self.emit_global(event, **kwargs)
@@ -42,8 +612,18 @@ class EventEmitter(object):
     def emit_global(self, event, **kwargs):
         return self._global_event_manager.emit(self, event, **kwargs)
 
-    def on_local(self, event, callback):
-        return self._local_event_manager.on(self, event, callback)
+    def fire_global(self, event, **kwargs):
+        self._global_event_manager.fire(self, event, **kwargs)
+
+    def on_local(self, event, callback, weak=True, sender_class=None, predicate=None):
+        return self._local_event_manager.on(self, event, callback, weak=weak, sender_class=sender_class,
+                                            predicate=predicate)
+
+    def off_local(self, event, callback):
+        return self._local_event_manager.off(self, event, callback)
 
     def emit_local(self, event, **kwargs):
         return self._local_event_manager.emit(self, event, **kwargs)
+
+    def fire_local(self, event, **kwargs):
+        self._local_event_manager.fire(self, event, **kwargs)
@@ -0,0 +1,251 @@
+"""
+An SQLite file holding resolved templates and prepared maps, so that they needn't stay in memory.
+
+Records are pickled. Templates inside them are stored as references to the templates table and
+looked up again when a record is read, so every template is stored once no matter how many
+records use it. Reads go through LRU caches, so memory use follows what's actually being looked
+at rather than the size of the game's data.
+"""
+import io
+import pickle
+import sqlite3
+import uuid
+from collections import defaultdict
+from functools import lru_cache
+
+from athanor.utils.templates import Template
+
+# Bumped whenever the tables change. A store of another version is emptied.
+STORE_VERSION = 4
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS templates (plugin TEXT, kind TEXT, key TEXT, data BLOB, "
+    "PRIMARY KEY (plugin, kind, key)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS maps (plugin TEXT, key TEXT, digest BLOB, PRIMARY KEY (plugin, key)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS map_entries (plugin TEXT, map TEXT, section TEXT, key, data BLOB, "
+    "PRIMARY KEY (plugin, map, section, key)) WITHOUT ROWID",
+)
+
+# The key that a map's 'map' section is stored under.
+MAP_KEY = ''
+
+
+class RecordPickler(pickle.Pickler):
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Template):
+            return obj.node
+        return None
+
+
+class RecordUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, store):
+        super().__init__(file)
+        self.store = store
+
+    def persistent_load(self, pid):
+        if (found := self.store.template(*pid)) is None:
+            raise ValueError(f"Stored gamedata refers to template {'/'.join(pid)}, which doesn't exist!")
+        return found
+
+
+class GameDataStore(object):
+    """
+    Writes are only kept once commit() is called.
+
+    Usage:
+        store = GameDataStore('server/gamedata.sqlite3')
+        store.write_templates({('core', 'rooms', 'base'): template})
+        store.commit()
+        store.template('core', 'rooms', 'base')
+    """
+
+    def __init__(self, path, cache_size=1024, batch_size=500):
+        """
+        Args:
+            path (str): The SQLite file. Created if it doesn't exist.
+            cache_size (int): How many templates, and separately how many map entries, are kept
+                in memory after being read.
+            batch_size (int): How many map records are held before being written.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.template = lru_cache(maxsize=cache_size)(self.read_template)
+        self.entry = lru_cache(maxsize=cache_size)(self.read_entry)
+        self.token = self.setup()
+
+    def setup(self):
+        """
+        Creates the tables if needed.
+
+        Returns:
+            token (str): Identifies this store's contents. It changes whenever they're discarded,
+                so that whoever relies on them can tell.
+        """
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        if meta.get('version', None) == str(STORE_VERSION) and meta.get('token', None):
+            return meta['token']
+        for table in ('templates', 'maps', 'map_entries', 'meta'):
+            self.connection.execute(f"DELETE FROM {table}")
+        token = uuid.uuid4().hex
+        self.connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                    [('version', str(STORE_VERSION)), ('token', token)])
+        self.connection.commit()
+        return token
+
+    def dumps(self, data):
+        buffer = io.BytesIO()
+        RecordPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(data)
+        return buffer.getvalue()
+
+    def loads(self, blob):
+        return RecordUnpickler(io.BytesIO(blob), self).load()
+
+    def clear_caches(self):
+        self.template.cache_clear()
+        self.entry.cache_clear()
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+        self.clear_caches()
+
+    def close(self):
+        self.connection.close()
+
+    def read_template(self, plugin, kind, key):
+        """
+        Use template() instead, which caches.
+
+        Returns:
+            template (Template or None)
+        """
+        row = self.connection.execute("SELECT data FROM templates WHERE plugin=? AND kind=? AND key=?",
+                                      (plugin, kind, key)).fetchone()
+        if row is None:
+            return None
+        # A template's own parents were merged into it when it was resolved, so it holds no references.
+        return Template((plugin, kind, key), pickle.loads(row[0]))
+
+    def write_templates(self, templates, replace=False):
+        """
+        Args:
+            templates (dict): (plugin, kind, key) -> Template.
+            replace (bool): Delete every other template.
+
+        Returns:
+            None
+        """
+        if replace:
+            self.connection.execute("DELETE FROM templates")
+        self.connection.executemany("INSERT OR REPLACE INTO templates (plugin, kind, key, data) VALUES (?, ?, ?, ?)",
+                                    [(*node, pickle.dumps(dict(data), protocol=pickle.HIGHEST_PROTOCOL))
+                                     for node, data in templates.items()])
+        self.clear_caches()
+
+    def delete_templates(self, nodes):
+        self.connection.executemany("DELETE FROM templates WHERE plugin=? AND kind=? AND key=?", list(nodes))
+        self.clear_caches()
+
+    def map_digest(self, plugin, key):
+        """
+        Returns:
+            digest (bytes, str, or None): What was given to write_map, or None if the map isn't stored.
+        """
+        row = self.connection.execute("SELECT digest FROM maps WHERE plugin=? AND key=?", (plugin, key)).fetchone()
+        return row[0] if row else None
+
+    def map_keys(self):
+        """
+        Returns:
+            keys (set): (plugin, map key) of every stored map.
+        """
+        return set(self.connection.execute("SELECT plugin, key FROM maps"))
+
+    def write_map(self, plugin, key, digest, records):
+        """
+        Replaces a map. Records are written in batches as they're read from records, so a map
+        never has to be held in memory whole.
+
+        Args:
+            plugin (str): The plugin it belongs to.
+            key (str): The map's key.
+            digest (bytes or str): Identifies the data it was built from.
+            records (iterable): (section, key, record), as from the GameData Controller's
+                prepare_records. A room's exits are stored apart from it, under 'exits'.
+
+        Returns:
+            None
+        """
+        self.delete_maps([(plugin, key)])
+        self.connection.execute("INSERT INTO maps (plugin, key, digest) VALUES (?, ?, ?)", (plugin, key, digest))
+        batch = list()
+        for section, entry_key, record in records:
+            batch.append((plugin, key, section, MAP_KEY if section == 'map' else entry_key, self.dumps(record)))
+            if len(batch) >= self.batch_size:
+                self.insert_entries(batch)
+                batch = list()
+        self.insert_entries(batch)
+
+    def insert_entries(self, rows):
+        self.connection.executemany("INSERT OR REPLACE INTO map_entries (plugin, map, section, key, data) "
+                                    "VALUES (?, ?, ?, ?, ?)", rows)
+
+    def delete_maps(self, keys):
+        """
+        Args:
+            keys (iterable): (plugin, map key) pairs.
+        """
+        keys = list(keys)
+        self.connection.executemany("DELETE FROM maps WHERE plugin=? AND key=?", keys)
+        self.connection.executemany("DELETE FROM map_entries WHERE plugin=? AND map=?", keys)
+        self.entry.cache_clear()
+
+    def read_entry(self, plugin, map_key, section, key):
+        """
+        Use entry() instead, which caches.
+
+        Returns:
+            entry (any): One record of a map, such as a room. None if there's no such entry.
+        """
+        if section == 'map':
+            key = MAP_KEY
+        if (entry := self.read_row(plugin, map_key, section, key)) is not None and section == 'rooms':
+            if (exits := self.read_row(plugin, map_key, 'exits', key)) is not None:
+                entry['exits'] = exits
+        return entry
+
+    def read_row(self, plugin, map_key, section, key):
+        row = self.connection.execute("SELECT data FROM map_entries WHERE plugin=? AND map=? AND section=? AND key=?",
+                                      (plugin, map_key, section, key)).fetchone()
+        return self.loads(row[0]) if row else None
+
+    def read_map(self, plugin, map_key):
+        """
+        Reads a whole map. This isn't cached.
+
+        Returns:
+            map_data (defaultdict or None): As the GameData Controller's prepare_map builds it.
+        """
+        if self.map_digest(plugin, map_key) is None:
+            return None
+        map_data = defaultdict(dict)
+        exits = dict()
+        for section, key, blob in self.connection.execute("SELECT section, key, data FROM map_entries "
+                                                          "WHERE plugin=? AND map=?", (plugin, map_key)):
+            if section == 'map':
+                map_data['map'] = self.loads(blob)
+            elif section == 'exits':
+                exits[key] = self.loads(blob)
+            else:
+                map_data[section][key] = self.loads(blob)
+        for room_key, room_exits in exits.items():
+            map_data['rooms'][room_key]['exits'] = room_exits
+        return map_data
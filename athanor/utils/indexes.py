@@ -0,0 +1,161 @@
+"""
+In-memory indexes used by Controllers to answer lookups without touching the database.
+"""
+from bisect import bisect_left, insort
+
+
+class PrefixIndex(object):
+    """
+    A case-insensitive index of names that supports exact and prefix lookups.
+
+    Keys are kept in a sorted list so that every key starting with a prefix is found with
+    a binary search followed by a short walk. Several values may share a key.
+    """
+
+    def __init__(self, pairs=None):
+        """
+        Args:
+            pairs (iterable or None): (key, value) pairs to begin with.
+        """
+        self.keys = list()
+        self.values = dict()
+        if pairs:
+            for key, value in pairs:
+                key = key.lower()
+                if (found := self.values.get(key, None)) is None:
+                    self.values[key] = [value]
+                elif value not in found:
+                    found.append(value)
+            self.keys = sorted(self.values.keys())
+
+    @classmethod
+    def rebuild(cls, exported, convert):
+        """
+        Recreates an index from export() without re-sorting it.
+
+        Args:
+            exported (tuple): The results of export().
+            convert (callable): Turns each exported value back into an indexed value.
+
+        Returns:
+            index (PrefixIndex)
+        """
+        index = cls()
+        keys, values = exported
+        index.keys = list(keys)
+        index.values = {key: [convert(value) for value in found] for key, found in values.items()}
+        return index
+
+    def export(self, convert):
+        """
+        Produces a picklable copy of this index.
+
+        Args:
+            convert (callable): Turns each indexed value into something picklable, like an id.
+
+        Returns:
+            exported (tuple)
+        """
+        return list(self.keys), {key: [convert(value) for value in found] for key, found in self.values.items()}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key.lower() in self.values
+
+    def add(self, key, value):
+        """
+        Adds a value under key.
+
+        Args:
+            key (str): The name to index by.
+            value (any): The thing to index.
+
+        Returns:
+            None
+        """
+        key = key.lower()
+        if (found := self.values.get(key, None)) is None:
+            self.values[key] = [value]
+            insort(self.keys, key)
+        elif value not in found:
+            found.append(value)
+
+    def remove(self, key, value):
+        """
+        Removes a value from key. Does nothing if it's not there.
+
+        Args:
+            key (str): The name it was indexed by.
+            value (any): The thing to remove.
+
+        Returns:
+            None
+        """
+        key = key.lower()
+        if (found := self.values.get(key, None)) is None or value not in found:
+            return
+        found.remove(value)
+        if not found:
+            del self.values[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def move(self, old_key, new_key, value):
+        """
+        Re-indexes a value after a rename.
+        """
+        self.remove(old_key, value)
+        self.add(new_key, value)
+
+    def exact(self, key, condition=None):
+        """
+        Args:
+            key (str): The name to look up.
+            condition (callable or None): If provided, only values it returns True for are included.
+
+        Returns:
+            values (list): Everything indexed under exactly this key.
+        """
+        found = self.values.get(key.lower(), ())
+        if condition is None:
+            return list(found)
+        return [value for value in found if condition(value)]
+
+    def prefix(self, prefix, condition=None):
+        """
+        Args:
+            prefix (str): The start of a name.
+            condition (callable or None): If provided, only values it returns True for are included.
+
+        Returns:
+            values (list): Everything indexed under a key that starts with prefix, in key order.
+        """
+        prefix = prefix.lower()
+        keys = self.keys
+        results = list()
+        index = bisect_left(keys, prefix)
+        while index < len(keys) and keys[index].startswith(prefix):
+            if condition is None:
+                results.extend(self.values[keys[index]])
+            else:
+                results.extend(value for value in self.values[keys[index]] if condition(value))
+            index += 1
+        return results
+
+    def find(self, text, exact=False, condition=None):
+        """
+        Resolves text the way players expect: an exact match always wins, otherwise every
+        key that starts with text is a candidate.
+
+        Args:
+            text (str): The name or partial name.
+            exact (bool): Don't consider partial matches.
+            condition (callable or None): If provided, only values it returns True for are included.
+
+        Returns:
+            values (list): Possibly empty, or with multiple entries if ambiguous.
+        """
+        if (found := self.exact(text, condition=condition)) or exact:
+            return found
+        return self.prefix(text, condition=condition)
@@ -0,0 +1,271 @@
+"""
+An append-only binary journal of Global Events.
+
+The EventJournal is attached to an EventManager as a sink. It encodes the events it's
+interested in as they're emitted and hands them to a writer thread in batches on a timer,
+so recording an event never touches the disk. One journal file is written per (UTC) day.
+
+The JournalReader memory-maps journal files and iterates over them without needing
+Django, Evennia, or a running server, so it can be used for post-incident analysis.
+
+File Format:
+    A file begins with the 5-byte header b'ATHJ\\x01'. It is followed by records of:
+        length (uint32): The size of the record body.
+        timestamp (float64): Unix time of the event.
+        event length (uint16), sender length (uint16)
+        body: The event name, the sender, and a JSON object of the event's arguments, all UTF-8.
+"""
+import datetime
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections import namedtuple
+
+
+HEADER = b'ATHJ\x01'
+RECORD = struct.Struct('<IdHH')
+SUFFIX = '.journal'
+
+JournalEntry = namedtuple('JournalEntry', ['timestamp', 'event', 'sender', 'data'])
+
+
+def describe(obj):
+    """
+    Renders an object as a short string for the journal. Database entities are
+    recorded by dbref and name so that they can be identified after renames.
+
+    Args:
+        obj (any): The thing to describe.
+
+    Returns:
+        description (str)
+    """
+    if (dbref := getattr(obj, 'dbref', None)):
+        return f"{dbref}:{obj}"
+    return str(obj)
+
+
+def utc_timestamp(when):
+    """
+    Args:
+        when (datetime or float or None): A time. A naive datetime is taken to be UTC.
+
+    Returns:
+        timestamp (float or None): Unix time.
+    """
+    if not isinstance(when, datetime.datetime):
+        return when
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return when.timestamp()
+
+
+class EventJournal(object):
+    """
+    An EventManager sink that records selected events to disk.
+    """
+
+    def __init__(self, path, events, flush_interval=2.0, max_buffer=1000):
+        """
+        Args:
+            path (str): The directory that journal files are written to.
+            events (iterable of str): The event names to record.
+            flush_interval (float): Seconds between writes.
+            max_buffer (int): If this many entries are waiting, a write is scheduled immediately.
+        """
+        self.path = path
+        self.events = set(events)
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer = list()
+        self.loop = None
+        self.flush_call = None
+        self.batches = queue.Queue()
+        self.writer = None
+
+    def record(self, obj, event, kwargs):
+        """
+        Called by the EventManager for every emitted event. The entry is encoded now, so that
+        it records the event's arguments as they were when it happened.
+        """
+        if event not in self.events:
+            return
+        timestamp = time.time()
+        try:
+            self.buffer.append((timestamp, self.encode(timestamp, event, describe(obj), kwargs)))
+        except Exception:
+            from evennia.utils.logger import log_trace
+            log_trace()
+            return
+        if len(self.buffer) >= self.max_buffer and self.flush_call is None:
+            from twisted.internet import reactor
+            self.flush_call = reactor.callLater(0, self.flush)
+
+    def encode(self, timestamp, event, sender, kwargs):
+        event = event.encode('utf-8')
+        sender = sender.encode('utf-8')
+        data = json.dumps({k: v for k, v in kwargs.items() if k != 'event_timestamp'},
+                          default=describe, separators=(',', ':')).encode('utf-8')
+        return RECORD.pack(len(event) + len(sender) + len(data), timestamp, len(event), len(sender)) \
+            + event + sender + data
+
+    def file_path(self, timestamp):
+        day = datetime.datetime.utcfromtimestamp(timestamp).strftime('%Y%m%d')
+        return os.path.join(self.path, f"events-{day}{SUFFIX}")
+
+    def flush(self):
+        """
+        Hands all buffered entries to the writer thread, or writes them now if it isn't running.
+
+        Returns:
+            None
+        """
+        self.flush_call = None
+        if not self.buffer:
+            return
+        buffer, self.buffer = self.buffer, list()
+        if self.writer is not None:
+            self.batches.put(buffer)
+        else:
+            self.write(buffer)
+
+    def write(self, entries):
+        """
+        Appends entries to disk, grouped by the day file they belong in. Errors are logged
+        rather than raised, and the entries are lost.
+
+        Args:
+            entries (list): (timestamp, encoded record) pairs.
+
+        Returns:
+            None
+        """
+        try:
+            grouped = dict()
+            for timestamp, record in entries:
+                grouped.setdefault(self.file_path(timestamp), list()).append(record)
+            os.makedirs(self.path, exist_ok=True)
+            for file_path, records in grouped.items():
+                with open(file_path, 'ab') as journal_file:
+                    if not journal_file.tell():
+                        journal_file.write(HEADER)
+                    journal_file.write(b''.join(records))
+        except Exception:
+            from evennia.utils.logger import log_trace
+            log_trace()
+
+    def write_batches(self):
+        """
+        The writer thread. Batches are written in the order they were flushed, until None arrives.
+        """
+        while (entries := self.batches.get()) is not None:
+            self.write(entries)
+
+    def start(self):
+        from twisted.internet.task import LoopingCall
+        self.writer = threading.Thread(target=self.write_batches, name='event-journal', daemon=True)
+        self.writer.start()
+        self.loop = LoopingCall(self.flush)
+        self.loop.start(self.flush_interval, now=False)
+
+    def stop(self):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        self.loop = None
+        if self.flush_call is not None and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush()
+        if self.writer is not None:
+            self.batches.put(None)
+            self.writer.join()
+            self.writer = None
+
+
+class JournalReader(object):
+    """
+    Reads journal files written by an EventJournal.
+
+    Usage:
+        reader = JournalReader('server/logs/events')
+        for entry in reader.filter(events=['account_offline'], sender='#5:'):
+            print(entry.timestamp, entry.sender)
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): A journal file, or a directory of them.
+        """
+        self.path = path
+
+    def files(self):
+        if os.path.isfile(self.path):
+            return [self.path]
+        return sorted(os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(SUFFIX))
+
+    def scan(self, file_path):
+        """
+        Iterates over the raw records of one file without decoding them.
+
+        Yields:
+            (timestamp, event bytes, sender bytes, data bytes)
+        """
+        if not os.path.getsize(file_path):
+            return
+        with open(file_path, 'rb') as journal_file:
+            with mmap.mmap(journal_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped[:len(HEADER)] != HEADER:
+                    raise ValueError(f"{file_path} is not an event journal!")
+                offset = len(HEADER)
+                end = len(mapped)
+                unpack = RECORD.unpack_from
+                size = RECORD.size
+                while offset + size <= end:
+                    length, timestamp, event_len, sender_len = unpack(mapped, offset)
+                    body = offset + size
+                    if body + length > end:
+                        # A partial record from an interrupted write. Nothing after it is readable.
+                        break
+                    sender_start = body + event_len
+                    data_start = sender_start + sender_len
+                    yield (timestamp, mapped[body:sender_start], mapped[sender_start:data_start],
+                           mapped[data_start:body + length])
+                    offset = body + length
+
+    def __iter__(self):
+        return self.filter()
+
+    def filter(self, events=None, sender=None, start=None, end=None):
+        """
+        Iterates over entries in chronological (file) order, decoding only those that match.
+
+        Args:
+            events (iterable of str or None): Only include these event names.
+            sender (str or None): Only include senders whose description starts with this.
+                Use '#5:' to select by dbref.
+            start (datetime or float or None): Only include entries at or after this time.
+                Naive datetimes are taken to be UTC, as the journal is written in UTC.
+            end (datetime or float or None): Only include entries before this time.
+
+        Yields:
+            entry (JournalEntry)
+        """
+        start, end = utc_timestamp(start), utc_timestamp(end)
+        events = {e.encode('utf-8') for e in events} if events is not None else None
+        sender = sender.encode('utf-8') if sender is not None else None
+        for file_path in self.files():
+            for timestamp, event, who, data in self.scan(file_path):
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    continue
+                if events is not None and event not in events:
+                    continue
+                if sender is not None and not who.startswith(sender):
+                    continue
+                yield JournalEntry(datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc),
+                                   event.decode('utf-8'), who.decode('utf-8'), json.loads(data))
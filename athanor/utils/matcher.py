@@ -0,0 +1,208 @@
+"""
+Multi-pattern name matching.
+
+Controllers keep a NameMatcher of every name they know about so that speech and other text
+can be scanned for names in one pass. Unlike a single giant regex alternation, the matcher is
+a trie: adding or removing a name costs O(len(name)) and never requires recompiling anything,
+and scanning text only walks the trie from word boundaries.
+"""
+import re
+
+
+_BOUNDARY = re.compile(r"\b")
+_END = None
+
+
+def is_word(char):
+    """
+    Matches the definition of a word character used by the re module's \\w and \\b.
+    """
+    return char.isalnum() or char == '_'
+
+
+class NameMatch(object):
+    """
+    A found name. Mimics the parts of re.Match that callers of sub() commonly use.
+    The matched text is available as group(), group(0), or group('found').
+    """
+    __slots__ = ('string', 'pos', 'endpos')
+
+    def __init__(self, string, pos, endpos):
+        self.string = string
+        self.pos = pos
+        self.endpos = endpos
+
+    def group(self, *args):
+        return self.string[self.pos:self.endpos]
+
+    def groupdict(self):
+        return {'found': self.group()}
+
+    def start(self, *args):
+        return self.pos
+
+    def end(self, *args):
+        return self.endpos
+
+    def span(self, *args):
+        return self.pos, self.endpos
+
+    def __repr__(self):
+        return f"<NameMatch span=({self.pos}, {self.endpos}), match={self.group()!r}>"
+
+
+class NameMatcher(object):
+    """
+    Finds known names in text, case-insensitively and only on word boundaries (the same
+    semantics as the regex r"(?i)\\b(?:name1|name2|...)\\b"). Where names overlap, the longest
+    name starting at the leftmost position wins.
+    """
+
+    def __init__(self, names=None):
+        """
+        Args:
+            names (iterable of str or None): Names to begin with.
+        """
+        self.root = dict()
+        self.count = 0
+        if names:
+            for name in names:
+                self.add(name)
+
+    @classmethod
+    def rebuild(cls, exported):
+        """
+        Recreates a matcher from export() without re-adding every name.
+        """
+        matcher = cls()
+        matcher.root, matcher.count = exported
+        return matcher
+
+    def export(self):
+        """
+        Returns:
+            exported (tuple): A picklable copy of this matcher's trie.
+        """
+        return self.root, self.count
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        node = self.root
+        for char in name:
+            if (node := node.get(char.lower(), None)) is None:
+                return False
+        return _END in node
+
+    def add(self, name):
+        """
+        Adds a name. Adding a name twice does nothing.
+
+        Args:
+            name (str): The name to add.
+
+        Returns:
+            None
+        """
+        if not name:
+            return
+        node = self.root
+        for char in name:
+            key = char.lower()
+            if (child := node.get(key, None)) is None:
+                child = dict()
+                node[key] = child
+            node = child
+        if _END not in node:
+            node[_END] = True
+            self.count += 1
+
+    def remove(self, name):
+        """
+        Removes a name and prunes any trie branches that are no longer needed.
+
+        Args:
+            name (str): The name to remove.
+
+        Returns:
+            None
+        """
+        if not name:
+            return
+        path = list()
+        node = self.root
+        for char in name:
+            key = char.lower()
+            if (child := node.get(key, None)) is None:
+                return
+            path.append((node, key))
+            node = child
+        if _END not in node:
+            return
+        del node[_END]
+        self.count -= 1
+        for parent, key in reversed(path):
+            if parent[key]:
+                break
+            del parent[key]
+
+    def finditer(self, text):
+        """
+        Iterates over every name found in text, left to right, without overlaps.
+
+        Args:
+            text (str): The text to scan.
+
+        Yields:
+            match (NameMatch)
+        """
+        if not self.count or not text:
+            return
+        root = self.root
+        length = len(text)
+        resume = 0
+        for boundary in _BOUNDARY.finditer(text):
+            start = boundary.start()
+            if start < resume or start == length:
+                continue
+            node = root
+            pos = start
+            found = -1
+            while pos < length and (node := node.get(text[pos].lower(), None)) is not None:
+                pos += 1
+                if _END in node and ((pos == length and is_word(text[pos - 1]))
+                                     or (pos < length and is_word(text[pos - 1]) != is_word(text[pos]))):
+                    found = pos
+            if found > start:
+                yield NameMatch(text, start, found)
+                resume = found
+
+    def search(self, text):
+        """
+        Returns the first name found in text, or None.
+        """
+        return next(self.finditer(text), None)
+
+    def sub(self, repl, text):
+        """
+        Replaces every name found in text, like re.sub().
+
+        Args:
+            repl (str or callable): A replacement string, or a callable that's given a
+                NameMatch and returns the replacement.
+            text (str): The text to scan.
+
+        Returns:
+            text (str)
+        """
+        output = list()
+        last = 0
+        for match in self.finditer(text):
+            output.append(text[last:match.pos])
+            output.append(repl(match) if callable(repl) else repl)
+            last = match.endpos
+        if not output:
+            return text
+        output.append(text[last:])
+        return ''.join(output)
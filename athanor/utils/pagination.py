@@ -0,0 +1,69 @@
+"""
+Cursor-based pagination for listing large tables.
+
+OFFSET pagination makes the database walk past every row before the page it wants, so each
+page is slower than the last. iter_pages instead remembers the last row it returned and asks
+for the rows after it, which the database can answer straight from an index.
+"""
+from django.db.models import Q
+
+
+def iter_pages(queryset, page_size, order='id'):
+    """
+    Iterates over a queryset one page at a time. Only one page is ever held in memory.
+
+    Args:
+        queryset (QuerySet): The rows to page through. Any filters should already be applied.
+        page_size (int): Rows per page.
+        order (str): The field to order by. Prefix with - for descending. Ties are broken by id,
+            so the field doesn't have to be unique, but it must not be nullable.
+
+    Yields:
+        page (list): Up to page_size rows.
+    """
+    descending = order.startswith('-')
+    field = order.lstrip('-')
+    op = 'lt' if descending else 'gt'
+    if field in ('id', 'pk'):
+        field = 'id'
+        queryset = queryset.order_by(f"{'-' if descending else ''}id")
+    else:
+        queryset = queryset.order_by(order, f"{'-' if descending else ''}id")
+    cursor = None
+    while True:
+        page = queryset
+        if cursor is not None:
+            value, last_id = cursor
+            if field == 'id':
+                page = page.filter(**{f"id__{op}": last_id})
+            else:
+                page = page.filter(Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": last_id}))
+        if not (page := list(page[:page_size])):
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+        cursor = (getattr(last, field), last.id)
+
+
+def render_pages(pages, header, footer, render):
+    """
+    Renders pages of rows into text, one message per page.
+
+    Args:
+        pages (iterable of lists): From iter_pages.
+        header (str): Put at the top of the first message.
+        footer (str): Sent after the last page.
+        render (callable): Called with a row. Returns a list of lines.
+
+    Yields:
+        text (str)
+    """
+    message = [header]
+    for page in pages:
+        for row in page:
+            message.extend(render(row))
+        yield '\n'.join(str(l) for l in message)
+        message = list()
+    yield '\n'.join(str(l) for l in message + [footer])
@@ -0,0 +1,346 @@
+"""
+Resolves template inheritance for game data.
+
+Templates are identified by (plugin, kind, key). Each may list parent templates under a
+'templates' key, as KEY, KIND/KEY or PLUGIN/KIND/KEY paths relative to itself. Resolving a
+template merges its parents' resolved data, in the order they're listed, and then its own.
+
+The resolver builds the inheritance graph once and merges templates in topological order, so
+every template is merged exactly once, after all of its parents. This module has no Django or
+Evennia dependencies.
+
+Records built from templates, such as a map's rooms, are Records: a small dict of the record's
+own fields in front of the shared template dicts, so tens of thousands of rooms using the same
+template don't each carry a copy of it. A Record is a Mapping but not a dict, so flatten() it
+before handing it to anything that only takes dicts, such as json or Evennia's Attributes.
+"""
+import sys
+from collections import deque
+from collections.abc import MutableMapping
+
+
+def template_name(node):
+    return '/'.join(node)
+
+
+class Template(dict):
+    """
+    A resolved template. It knows which template it is, so that records built on it can refer to
+    it by name when stored.
+    """
+    __slots__ = ('node',)
+
+    def __init__(self, node, data):
+        super().__init__(data)
+        self.node = node
+
+
+def intern_keys(data):
+    """
+    Args:
+        data (dict)
+
+    Returns:
+        data (dict): A copy whose string keys are interned, so every record shares one copy of
+            each field name.
+    """
+    return {sys.intern(key) if isinstance(key, str) else key: value for key, value in data.items()}
+
+
+class Record(MutableMapping):
+    """
+    A record's own fields, reading through to the templates it was built on for the rest.
+    Writes and deletes only ever touch its own fields. It has no __dict__, so it costs little
+    more than its own fields do.
+    """
+    __slots__ = ('data', 'parents')
+
+    def __init__(self, data, parents=()):
+        """
+        Args:
+            data (dict): The record's own fields. These win over the templates'.
+            parents (tuple of dict): Templates, in merge order. Later ones win. Records built
+                on the same templates can share one tuple.
+        """
+        self.data = data
+        self.parents = parents
+
+    def __getitem__(self, key):
+        if key in self.data:
+            return self.data[key]
+        for parent in reversed(self.parents):
+            if key in parent:
+                return parent[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self.data:
+            return self.data[key]
+        for parent in reversed(self.parents):
+            if key in parent:
+                return parent[key]
+        return default
+
+    def __contains__(self, key):
+        return key in self.data or any(key in parent for parent in self.parents)
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def merged(self):
+        """
+        Returns:
+            merged (dict): A shallow copy of every field, as if the templates had been copied in.
+        """
+        merged = dict()
+        for parent in self.parents:
+            merged.update(parent)
+        merged.update(self.data)
+        return merged
+
+    def __iter__(self):
+        return iter(self.merged())
+
+    def __len__(self):
+        return len(self.merged())
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.merged()
+        return self.merged() == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return Record, (self.data, self.parents)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.data!r}, {self.parents!r})"
+
+
+def overlay(data, parents=()):
+    """
+    Builds a record that reads through to its templates instead of copying them.
+
+    Args:
+        data (dict): The record's own fields. These win over the templates'.
+        parents (tuple of dict): Resolved templates, in merge order. Later ones win. They are
+            shared by every record using them, and are never written to. Pass the same tuple
+            for records built on the same templates, and it's shared too.
+
+    Returns:
+        record (Record)
+    """
+    return Record(intern_keys(data), parents if isinstance(parents, tuple) else tuple(parents))
+
+
+def flatten(value):
+    """
+    Copies a Record, and any Records inside it, into plain dicts and lists, for json, Evennia's
+    Attributes, or anything else that only takes dicts.
+
+    Args:
+        value (any): A Record, or a dict or list that may contain them.
+
+    Returns:
+        flat (any): Nothing in it is shared with the templates.
+    """
+    if isinstance(value, Record):
+        value = value.merged()
+    if isinstance(value, dict):
+        return {key: flatten(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [flatten(item) for item in value]
+    return value
+
+
+def split_path(path, plugin, kind):
+    """
+    Turns a template path into a (plugin, kind, key) node.
+
+    Args:
+        path (str): KEY, KIND/KEY, or PLUGIN/KIND/KEY.
+        plugin (str): The plugin to use if path doesn't specify one.
+        kind (str): The kind to use if path doesn't specify one.
+
+    Returns:
+        node (tuple)
+    """
+    split = path.split('/')
+    if len(split) == 1:
+        return plugin, kind, split[0]
+    if len(split) == 2:
+        return plugin, split[0], split[1]
+    if len(split) == 3:
+        return tuple(split)
+    raise ValueError(f"Template path '{path}' is malformed. Use KEY, KIND/KEY, or PLUGIN/KIND/KEY.")
+
+
+class TemplateResolver(object):
+    """
+    Usage:
+        resolver = TemplateResolver({('core', 'rooms', 'base'): {...}, ...})
+        resolved = resolver.resolve()
+    """
+
+    def __init__(self, templates, finalize=None):
+        """
+        Args:
+            templates (dict): (plugin, kind, key) -> raw template data.
+            finalize (callable or None): Called with (node, merged data) once per template after
+                merging. Returns the data to store, which is what children inherit.
+        """
+        self.templates = templates
+        self.finalize = finalize
+        self.path_cache = dict()
+        self.graph = None
+
+    def resolve_path(self, path, plugin, kind):
+        """
+        A memoized split_path.
+        """
+        if (found := self.path_cache.get((path, plugin, kind), None)) is None:
+            found = split_path(path, plugin, kind)
+            self.path_cache[(path, plugin, kind)] = found
+        return found
+
+    def parents(self, node):
+        """
+        Args:
+            node (tuple): A template.
+
+        Returns:
+            parents (list): The nodes it inherits from, in merge order.
+        """
+        parents = self.templates[node].get('templates', None)
+        if not parents:
+            return list()
+        if isinstance(parents, str):
+            parents = [parents]
+        resolved = list()
+        for path in parents:
+            parent = self.resolve_path(path, node[0], node[1])
+            if parent not in self.templates:
+                raise ValueError(f"Template {template_name(node)} inherits from {template_name(parent)}, "
+                                 f"which doesn't exist!")
+            resolved.append(parent)
+        return resolved
+
+    def build_graph(self):
+        """
+        Returns:
+            graph (dict): node -> list of parent nodes.
+        """
+        self.graph = {node: self.parents(node) for node in self.templates}
+        return self.graph
+
+    def children(self):
+        """
+        Returns:
+            children (dict): node -> list of nodes that directly inherit from it.
+        """
+        graph = self.graph if self.graph is not None else self.build_graph()
+        children = {node: list() for node in graph}
+        for node, parents in graph.items():
+            for parent in parents:
+                children[parent].append(node)
+        return children
+
+    def descendants(self, nodes):
+        """
+        Args:
+            nodes (iterable): Templates.
+
+        Returns:
+            affected (set): nodes and every template that inherits from them, however indirectly.
+        """
+        children = self.children()
+        affected = set()
+        queue = deque(node for node in nodes if node in children)
+        while queue:
+            if (node := queue.popleft()) in affected:
+                continue
+            affected.add(node)
+            queue.extend(children[node])
+        return affected
+
+    def order(self, nodes=None):
+        """
+        Sorts templates so that every template comes after all of its parents.
+
+        Args:
+            nodes (set or None): Only sort these. Their parents outside of nodes are assumed done.
+
+        Returns:
+            ordered (list)
+        """
+        graph = self.graph if self.graph is not None else self.build_graph()
+        if nodes is None:
+            nodes = graph.keys()
+        waiting = {node: sum(1 for parent in graph[node] if parent in nodes) for node in nodes}
+        children = self.children()
+        ready = deque(node for node, count in waiting.items() if not count)
+        ordered = list()
+        while ready:
+            node = ready.popleft()
+            ordered.append(node)
+            for child in children[node]:
+                if child not in waiting:
+                    continue
+                waiting[child] -= 1
+                if not waiting[child]:
+                    ready.append(child)
+        if len(ordered) < len(waiting):
+            done = set(ordered)
+            self.report_cycle([node for node in waiting if node not in done])
+        return ordered
+
+    def report_cycle(self, stuck):
+        """
+        Raises a ValueError naming one cycle among templates that could not be ordered.
+
+        Args:
+            stuck (list): Templates left waiting on parents after sorting.
+        """
+        stuck_set = set(stuck)
+        path = list()
+        seen = dict()
+        node = stuck[0]
+        # Every stuck template has a stuck parent, so following them must eventually loop.
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = next(parent for parent in self.graph[node] if parent in stuck_set)
+        cycle = path[seen[node]:] + [node]
+        raise ValueError(f"Template inheritance cycle detected: {' -> '.join(template_name(n) for n in cycle)} "
+                         f"({len(stuck)} templates cannot be resolved)")
+
+    def merge(self, node, resolved):
+        data = dict()
+        for parent in self.graph[node]:
+            data.update(resolved[parent])
+        data.update(self.templates[node])
+        data.pop('templates', None)
+        if self.finalize:
+            data = self.finalize(node, data)
+        return data
+
+    def resolve(self, nodes=None, resolved=None):
+        """
+        Merges templates in topological order.
+
+        Args:
+            nodes (set or None): Only resolve these. Everything, if None.
+            resolved (dict or None): Previously resolved templates. Parents outside of nodes are
+                taken from here.
+
+        Returns:
+            resolved (dict): node -> merged data. Includes everything passed in resolved.
+        """
+        resolved = dict(resolved) if resolved else dict()
+        for node in self.order(nodes):
+            resolved[node] = self.merge(node, resolved)
+        return resolved
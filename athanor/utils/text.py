@@ -163,7 +163,7 @@ class Speech(object):
         if rendered_text:
             self.markup_string = rendered_text
         else:
-            self.markup_string = self.controller.reg_names.sub(self.markup_names, self.speech_string)
+            self.markup_string = self.controller.name_matcher.sub(self.markup_names, self.speech_string)
 
     def markup_names(self, match):
         found = match.group('found')
@@ -0,0 +1,90 @@
+"""
+Notices changes to files on disk by polling, which works on any platform and filesystem.
+"""
+import os
+
+from evennia.utils.logger import log_trace
+
+
+def scan_files(directories):
+    """
+    Args:
+        directories (iterable of str): Directories to scan recursively.
+
+    Returns:
+        files (dict): file path -> (mtime_ns, size)
+    """
+    found = dict()
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            for name in files:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    # Deleted between listing and stat. The next scan will report it gone.
+                    continue
+                found[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+class DataWatcher(object):
+    """
+    Polls directories and calls back with the files that were created, modified, or deleted.
+
+    A change is only reported once two polls in a row agree on it, so that a file which is still
+    being written, or one of several files being saved together, isn't handled half-finished.
+
+    Usage:
+        watcher = DataWatcher(['plugin/data'], reload_files, interval=2.0)
+        watcher.start()
+    """
+
+    def __init__(self, directories, callback, interval=2.0, known=None):
+        """
+        Args:
+            directories (iterable of str): Directories to watch.
+            callback (callable): Called with a set of changed file paths.
+            interval (float): Seconds between polls.
+            known (dict or None): file path -> (mtime_ns, size) of what the caller has already
+                seen. If None, the directories are scanned now.
+        """
+        self.directories = list(directories)
+        self.callback = callback
+        self.interval = interval
+        self.known = dict(known) if known is not None else scan_files(self.directories)
+        self.pending = dict()
+        self.loop = None
+
+    def poll(self):
+        """
+        Scans once, calling the callback if changes have settled.
+
+        Returns:
+            changed (set): The file paths reported to the callback, if any.
+        """
+        current = scan_files(self.directories)
+        changed = {file_path: current.get(file_path, None) for file_path in current.keys() | self.known.keys()
+                   if current.get(file_path, None) != self.known.get(file_path, None)}
+        if changed != self.pending:
+            self.pending = changed
+            return set()
+        if not changed:
+            return set()
+        self.pending = dict()
+        self.known = current
+        try:
+            self.callback(set(changed))
+        except Exception:
+            log_trace()
+        return set(changed)
+
+    def start(self):
+        from twisted.internet.task import LoopingCall
+        self.loop = LoopingCall(self.poll)
+        self.loop.start(self.interval, now=False)
+
+    def stop(self):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        self.loop = None
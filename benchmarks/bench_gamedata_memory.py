@@ -0,0 +1,99 @@
+"""
+Measures the memory held by prepared map records, built by copying their templates into each
+record as AthanorGameDataController.prepare_data used to, and as Records overlaying shared
+templates. Needs neither Django nor Evennia.
+
+Usage:
+    python benchmarks/bench_gamedata_memory.py [--rooms 10000 50000] [--templates 8] [--fields 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from athanor.utils.templates import intern_keys, overlay
+
+
+def synthetic_map(rooms, templates, fields, seed=0):
+    """
+    Builds YAML for a map of rooms, each using one of a few templates and adding a name and a
+    couple of fields of its own, and YAML for those templates. Parsing it, rather than building
+    the dicts directly, gives every record its own key strings, as loading real files does.
+    """
+    rng = random.Random(seed)
+    template_data = {f"template{t}": {f"field{f}": f"value {t} {f} " * 4 for f in range(fields)}
+                     for t in range(templates)}
+    room_data = dict()
+    for r in range(rooms):
+        room_data[f"room{r}"] = {'templates': f"template{rng.randrange(templates)}", 'name': f"Room {r}",
+                                 f"field{rng.randrange(fields)}": r}
+    return yaml.dump(template_data, Dumper=SafeDumper), yaml.dump({'rooms': room_data}, Dumper=SafeDumper)
+
+
+def copied(templates, room_data):
+    rooms = dict()
+    for key, data in room_data.items():
+        record = dict()
+        record.update(templates[data.pop('templates')])
+        record.update(data)
+        rooms[key] = record
+    return rooms
+
+
+def overlaid(templates, room_data):
+    parents = {key: (intern_keys(data),) for key, data in templates.items()}
+    return {key: overlay(data, parents[data.pop('templates')]) for key, data in room_data.items()}
+
+
+def measure(build, template_text, map_text):
+    """
+    Returns:
+        held (int), elapsed (float): Bytes still allocated for the records, and build seconds.
+            The build is timed in a separate run, since tracemalloc slows every allocation.
+    """
+    templates = yaml.load(template_text, Loader=SafeLoader)
+    room_data = yaml.load(map_text, Loader=SafeLoader)['rooms']
+    start = time.perf_counter()
+    records = build(templates, room_data)
+    elapsed = time.perf_counter() - start
+    del templates, room_data, records
+    tracemalloc.start()
+    templates = yaml.load(template_text, Loader=SafeLoader)
+    room_data = yaml.load(map_text, Loader=SafeLoader)['rooms']
+    records = build(templates, room_data)
+    del templates, room_data
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert records
+    return held, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--templates', type=int, default=8)
+    parser.add_argument('--fields', type=int, default=20, help="Fields per template.")
+    args = parser.parse_args()
+
+    print(f"{'Rooms':>8} {'Copied MB':>10} {'Overlay MB':>11} {'Saved':>6} {'Copied s':>9} {'Overlay s':>10}")
+    for rooms in args.rooms:
+        texts = synthetic_map(rooms, args.templates, args.fields)
+        copied_held, copied_time = measure(copied, *texts)
+        overlay_held, overlay_time = measure(overlaid, *texts)
+        print(f"{rooms:>8} {copied_held / 2**20:>10.1f} {overlay_held / 2**20:>11.1f} "
+              f"{1 - overlay_held / copied_held:>6.0%} {copied_time:>9.3f} {overlay_time:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmarks template resolution on synthetic template sets.
+
+Compares athanor.utils.templates.TemplateResolver against the multi-pass algorithm that
+AthanorGameDataController.prepare_templates used before it. Needs neither Django nor Evennia.
+
+Usage:
+    python benchmarks/bench_templates.py [--sizes 1000 10000 50000] [--depth 40] [--legacy-limit 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from athanor.utils.templates import TemplateResolver, split_path
+
+
+def synthetic_templates(count, depth, plugins=4, kinds=6, max_parents=3, seed=0):
+    """
+    Builds count templates spread over several plugins and kinds. Each template inherits from up
+    to max_parents templates created before it, with inheritance chains of up to depth levels.
+    The result is shuffled so that parents don't conveniently come first.
+    """
+    rng = random.Random(seed)
+    nodes = list()
+    level = dict()
+    templates = dict()
+    for i in range(count):
+        node = (f"plugin{i % plugins}", f"kind{rng.randrange(kinds)}", f"template{i}")
+        parents = list()
+        if nodes:
+            for parent in rng.sample(nodes[-500:], min(len(nodes[-500:]), rng.randrange(max_parents + 1))):
+                if level[parent] < depth:
+                    parents.append(parent)
+        level[node] = max((level[parent] + 1 for parent in parents), default=0)
+        data = {f"field{rng.randrange(20)}": i, 'name': node[2]}
+        if parents:
+            data['templates'] = [f"{p[0]}/{p[1]}/{p[2]}" for p in parents]
+        templates[node] = data
+        nodes.append(node)
+    items = list(templates.items())
+    rng.shuffle(items)
+    return dict(items), max(level.values(), default=0)
+
+
+def legacy_resolve(templates_raw):
+    """
+    The previous prepare_templates algorithm: repeated passes over every unresolved template.
+    """
+    resolved = dict()
+    templates_left = set(templates_raw.keys())
+    loaded_set = set()
+    current_count = 0
+    while len(templates_left) > 0:
+        start_count = current_count
+        for template in templates_left:
+            template_data = templates_raw[template]
+            template_list = template_data.get('templates', list())
+            if isinstance(template_list, str):
+                template_list = [template_list]
+            parents = [split_path(template_par, template[0], template[1]) for template_par in template_list]
+            if len(set(parents) - loaded_set) > 0:
+                continue
+            final_data = dict()
+            for template_par in parents:
+                final_data.update(templates_raw[template_par])
+            final_data.update(templates_raw[template])
+            final_data.pop('templates', None)
+            resolved[template] = final_data
+            loaded_set.add(template)
+            current_count += 1
+        templates_left -= loaded_set
+        if start_count == current_count:
+            raise ValueError("Unresolveable templates detected!")
+    return resolved
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--depth', type=int, default=40, help="Maximum inheritance chain length.")
+    parser.add_argument('--legacy-limit', type=int, default=10000,
+                        help="Skip the legacy algorithm for sets larger than this.")
+    args = parser.parse_args()
+
+    print(f"{'Templates':>10} {'Depth':>6} {'Resolver s':>11} {'Legacy s':>10} {'Speedup':>8}")
+    for size in args.sizes:
+        templates, depth = synthetic_templates(size, args.depth)
+        resolved, elapsed = timed(lambda: TemplateResolver(templates).resolve())
+        assert len(resolved) == size
+        legacy = '-'
+        speedup = '-'
+        if size <= args.legacy_limit:
+            _, legacy_elapsed = timed(legacy_resolve, templates)
+            legacy = f"{legacy_elapsed:.3f}"
+            speedup = f"{legacy_elapsed / elapsed:.1f}x"
+        print(f"{size:>10} {depth:>6} {elapsed:>11.3f} {legacy:>10} {speedup:>8}")
+
+
+if __name__ == '__main__':
+    main()